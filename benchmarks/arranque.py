@@ -0,0 +1,138 @@
+"""
+Benchmark del arranque de protest_monitor.py, medido con `python -X importtime`.
+
+Mide, cada uno en un proceso nuevo:
+
+- importacion: tiempo acumulado de `import protest_monitor` según -X importtime.
+- ayuda: `python protest_monitor.py --help` completo, el camino más corto de la línea de comandos.
+
+Además verifica que importar el módulo no cargue las dependencias pesadas (la IA, la
+búsqueda web, la comparación de textos y el rastreo), que deben cargarse recién cuando
+la corrida las usa, y muestra los paquetes que más tardan en importarse.
+
+Cada valor es el mínimo de varias repeticiones. Se comparan con
+benchmarks/referencia_arranque.json y el script termina con error si alguno empeora más
+que el umbral o si alguna dependencia pesada se importa de entrada.
+
+Uso:
+    python benchmarks/arranque.py [--repeticiones 5] [--umbral 0.5] [--actualizar-referencia]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+DIRECTORIO_BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+DIRECTORIO_RAIZ = os.path.dirname(DIRECTORIO_BENCHMARKS)
+RUTA_REFERENCIA = os.path.join(DIRECTORIO_BENCHMARKS, 'referencia_arranque.json')
+
+# Módulos que no deben quedar cargados después de `import protest_monitor`.
+MODULOS_DIFERIDOS = ('requests', 'lxml', 'zhipuai', 'thefuzz', 'rapidfuzz', 'ddgs')
+# Diferencias menores a esto (en milisegundos) no se consideran regresiones.
+MILISEGUNDOS_MINIMOS_REGRESION = 5
+
+
+def _python(*argumentos):
+    return subprocess.run([sys.executable, *argumentos], cwd=DIRECTORIO_RAIZ,
+                          capture_output=True, text=True, check=True)
+
+
+def medir_importacion():
+    """
+    Importa el módulo en un proceso nuevo con -X importtime. Devuelve los milisegundos
+    acumulados de protest_monitor y {paquete: milisegundos} de sus importaciones directas.
+    """
+    salida = _python('-X', 'importtime', '-c', 'import protest_monitor').stderr
+    filas = []
+    for linea in salida.splitlines():
+        if linea.startswith('import time:') and 'cumulative' not in linea:
+            _, acumulado, nombre = linea[len('import time:'):].split('|')
+            filas.append((len(nombre) - len(nombre.lstrip()), nombre.strip(), int(acumulado) / 1000))
+
+    # -X importtime escribe cada módulo después de los que importa, con más sangría
+    posicion = next(i for i, (_, nombre, _) in enumerate(filas) if nombre == 'protest_monitor')
+    nivel_modulo, _, total = filas[posicion]
+    paquetes = {}
+    for nivel, nombre, milisegundos in reversed(filas[:posicion]):
+        if nivel <= nivel_modulo:
+            break
+        if nivel == nivel_modulo + 2:
+            paquetes[nombre] = milisegundos
+    return total, paquetes
+
+
+def medir_ayuda():
+    inicio = time.perf_counter()
+    _python('protest_monitor.py', '--help')
+    return (time.perf_counter() - inicio) * 1000
+
+
+def modulos_cargados():
+    """Dependencias pesadas que quedaron importadas después de `import protest_monitor`."""
+    codigo = ("import json, sys, protest_monitor; "
+              f"print(json.dumps([m for m in {MODULOS_DIFERIDOS!r} if m in sys.modules]))")
+    return json.loads(_python('-c', codigo).stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del arranque de protest_monitor.py.")
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--umbral', type=float, default=0.5,
+                        help="empeoramiento relativo tolerado respecto de la referencia (0.5 = 50%%)")
+    parser.add_argument('--actualizar-referencia', action='store_true',
+                        help="guarda los resultados como nueva referencia en lugar de compararlos")
+    argumentos = parser.parse_args()
+
+    importaciones = [medir_importacion() for _ in range(argumentos.repeticiones)]
+    importacion, paquetes = min(importaciones, key=lambda medicion: medicion[0])
+    resultados = {
+        'importacion': importacion,
+        'ayuda': min(medir_ayuda() for _ in range(argumentos.repeticiones)),
+    }
+    cargados = modulos_cargados()
+
+    try:
+        with open(RUTA_REFERENCIA, 'r', encoding='utf-8') as f:
+            referencia = json.load(f)
+    except FileNotFoundError:
+        referencia = None
+
+    print("Importaciones más lentas de protest_monitor (ms acumulados):")
+    for nombre, milisegundos in sorted(paquetes.items(), key=lambda item: item[1], reverse=True)[:10]:
+        print(f"  {nombre:<28} {milisegundos:>8.1f}")
+
+    regresiones = []
+    print(f"\n{'MEDICIÓN':<16} {'MS':>10} {'REFERENCIA':>11} {'CAMBIO':>8}")
+    print("-" * 48)
+    for nombre, milisegundos in resultados.items():
+        linea = f"{nombre:<16} {milisegundos:>10.1f}"
+        anterior = None if argumentos.actualizar_referencia else (referencia or {}).get('milisegundos', {}).get(nombre)
+        if anterior:
+            cambio = milisegundos / anterior - 1
+            linea += f" {anterior:>11.1f} {100 * cambio:>+7.0f}%"
+            if cambio > argumentos.umbral and milisegundos - anterior >= MILISEGUNDOS_MINIMOS_REGRESION:
+                regresiones.append(nombre)
+                linea += "  <-- regresión"
+        print(linea)
+
+    if cargados:
+        print(f"\n[!] Se importan al cargar el módulo: {', '.join(cargados)}")
+        return 1
+    if argumentos.actualizar_referencia or referencia is None:
+        with open(RUTA_REFERENCIA, 'w', encoding='utf-8') as f:
+            json.dump({'milisegundos': {nombre: round(valor, 1) for nombre, valor in resultados.items()}},
+                      f, ensure_ascii=False, indent=1)
+            f.write("\n")
+        print(f"\nReferencia guardada en {RUTA_REFERENCIA}.")
+    elif regresiones:
+        print(f"\n[!] {len(regresiones)} mediciones empeoraron más de {100 * argumentos.umbral:.0f}%: {', '.join(regresiones)}")
+        return 1
+    else:
+        print(f"\nSin regresiones mayores a {100 * argumentos.umbral:.0f}% ni dependencias pesadas cargadas de entrada.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+"""
+Verifica que consolidar_eventos (con el índice por fecha y claves de similitud) fusione
+exactamente los mismos eventos que el algoritmo original, que compara cada evento con
+todos los ya consolidados usando los umbrales 80/80/85 de thefuzz.
+
+Consolida con los dos los eventos de protests.json (u otro archivo) y compara los
+resultados evento por evento y en el mismo orden. Como los eventos guardados ya están
+consolidados, también se comparan separando cada uno en un evento por fuente, como los
+informó la IA, para que haya fusiones: con una semilla fija, algunas copias tienen un campo
+sin especificar o las palabras del motivo en otro orden, y se mezclan. Las fuentes se comparan sin URLs repetidas, porque
+el algoritmo original repetía las que ya estaban en el texto de fuentes de un evento guardado.
+
+El algoritmo original es cuadrático: con todo protests.json tarda alrededor de un minuto
+por comparación. Con --limite se verifica sólo con los primeros N eventos.
+
+Uso: python benchmarks/consolidacion.py [--archivo protests.json] [--limite N]
+"""
+import argparse
+import copy
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import protest_monitor as pm
+
+
+def consolidar_eventos_original(eventos):
+    """Copia de consolidar_eventos antes del índice por fecha (sin cambios, salvo el import de fuzz)."""
+    fuzz = pm.fuzz
+    eventos_consolidados = []
+    for evento_nuevo in eventos:
+        encontrado = False
+        for evento_existente in eventos_consolidados:
+            # Criterios de similitud usando thefuzz
+            lugar_ratio = fuzz.token_sort_ratio(evento_nuevo.get('lugar', ''), evento_existente.get('lugar', ''))
+            quien_ratio = fuzz.token_sort_ratio(evento_nuevo.get('quien', ''), evento_existente.get('quien', ''))
+            motivo_ratio = fuzz.token_sort_ratio(evento_nuevo.get('motivo', ''), evento_existente.get('motivo', ''))
+
+            # Considerar el mismo evento si la fecha es la misma y hay una alta similitud en lugar, quien o motivo
+            if (evento_nuevo.get('fecha') == evento_existente.get('fecha') and
+                (lugar_ratio > 80 or quien_ratio > 80 or motivo_ratio > 85)):
+
+                # Es el mismo evento, consolidamos la información
+                for clave in ['horario', 'lugar', 'quien', 'motivo']:
+                    if evento_existente.get(clave) == 'No especificado' and evento_nuevo.get(clave) != 'No especificado':
+                        evento_existente[clave] = evento_nuevo.get(clave)
+
+                # Agregamos la nueva fuente a la lista de fuentes
+                if isinstance(evento_existente.get('fuente'), list):
+                    if evento_nuevo.get('fuente') not in evento_existente['fuente']:
+                        evento_existente['fuente'].append(evento_nuevo.get('fuente'))
+                else:
+                    evento_existente['fuente'] = [evento_existente.get('fuente'), evento_nuevo.get('fuente')]
+
+                encontrado = True
+                break
+
+        if not encontrado:
+            eventos_consolidados.append(evento_nuevo)
+
+    # Convertir las listas de fuentes a strings para la impresión
+    for evento in eventos_consolidados:
+        if isinstance(evento.get('fuente'), list):
+            evento['fuente'] = ", ".join(evento['fuente'])
+
+    return eventos_consolidados
+
+
+def _normalizar(evento):
+    """El evento como diccionario del JSON, con las fuentes sin URLs repetidas ni vacías."""
+    datos = evento.a_dict() if isinstance(evento, pm.Evento) else dict(evento)
+    if isinstance(datos.get('fuente'), str):
+        datos['fuente'] = ", ".join(url for url in dict.fromkeys(datos['fuente'].split(", ")) if url)
+    return datos
+
+
+def separar_por_fuente(eventos, semilla=0):
+    """Un evento por cada URL de fuente de cada evento, con pequeñas variaciones y mezclados."""
+    rnd = random.Random(semilla)
+    separados = []
+    for evento in eventos:
+        fuentes = evento.get('fuente')
+        for url in (fuentes.split(", ") if isinstance(fuentes, str) else fuentes or [fuentes]):
+            copia = dict(evento, fuente=url)
+            if rnd.random() < 0.3:
+                copia[rnd.choice(['horario', 'lugar', 'quien'])] = 'No especificado'
+            if rnd.random() < 0.3 and isinstance(copia.get('motivo'), str):
+                palabras = copia['motivo'].split()
+                rnd.shuffle(palabras)
+                copia['motivo'] = " ".join(palabras)
+            separados.append(copia)
+    rnd.shuffle(separados)
+    return separados
+
+
+def comparar(nombre, eventos):
+    """Consolida `eventos` con los dos algoritmos e informa si coinciden. Devuelve True si coinciden."""
+    inicio = time.perf_counter()
+    originales = consolidar_eventos_original(copy.deepcopy(eventos))
+    segundos_original = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    indexados = pm.consolidar_eventos(copy.deepcopy(eventos))
+    segundos_indexado = time.perf_counter() - inicio
+
+    print(f"{nombre}: {len(eventos)} eventos")
+    print(f"  original:   {len(originales)} eventos consolidados en {segundos_original:.2f} s")
+    print(f"  con índice: {len(indexados)} eventos consolidados en {segundos_indexado:.2f} s")
+
+    diferencias = [(posicion, original, indexado) for posicion, (original, indexado)
+                   in enumerate(zip(map(_normalizar, originales), map(_normalizar, indexados)))
+                   if original != indexado]
+    for posicion, original, indexado in diferencias[:5]:
+        print(f"  [!] Evento {posicion}:\n    original:   {original}\n    con índice: {indexado}")
+    if len(originales) != len(indexados) or diferencias:
+        print(f"  [!] Los resultados no coinciden ({len(diferencias)} eventos distintos).")
+        return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara consolidar_eventos con el algoritmo original.")
+    parser.add_argument('--archivo', default=pm.RUTA_PROTESTS_JSON)
+    parser.add_argument('--limite', type=int, default=None, help="verificar sólo con los primeros N eventos")
+    argumentos = parser.parse_args()
+
+    with open(argumentos.archivo, 'r', encoding='utf-8') as f:
+        datos = json.load(f)
+    eventos = (datos.get('events', []) if isinstance(datos, dict) else datos)[:argumentos.limite]
+
+    coinciden = [comparar("Eventos guardados", eventos),
+                 comparar("Separados por fuente", separar_por_fuente(eventos))]
+    if not all(coinciden):
+        return 1
+    print("\nLos dos algoritmos fusionan los mismos eventos.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
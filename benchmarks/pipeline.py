@@ -0,0 +1,622 @@
+"""
+Benchmark de la cadena completa de monitoreo, sin red ni API.
+
+Reproduce portadas y artículos grabados, con respuestas de la IA y de DDGS enlatadas, a
+través de reemplazos locales de la sesión HTTP, del cliente de ZhipuAI y de DDGS, y mide
+cada etapa:
+
+- enlaces: selección de enlaces relevantes de cada portada (seleccionar_enlaces).
+- texto: extracción del texto de cada artículo (extraer_texto_articulo).
+- rastreo: monitorear_sitios de punta a punta (descargas, prefiltro, IA, cachés).
+- datos_faltantes: búsqueda del horario de los eventos que no lo tienen (completar_datos_faltantes).
+- consolidacion_N, consolidacion_paralela_N, guardado_N, guardado_incremental_N, carga_N,
+  archivado_N: consolidar_eventos, consolidar_eventos_en_paralelo (que además se verifica
+  que dé lo mismo que en serie), guardar_eventos_para_web (completo y de un solo día), la lectura
+  del almacenamiento (cargar_historial) y el archivo de los meses viejos, con N eventos
+  sintéticos (por defecto 1.000, 10.000 y 100.000). De la carga se informa además la
+  memoria que ocupan los eventos, comparada con la de los diccionarios del JSON. Después
+  del guardado incremental y del archivado se verifica que los índices de fuentes sean los
+  mismos que rehace reconstruir_indice, y que el archivado no cambie las URLs de fuentes
+  que se consideran procesadas.
+
+También se verifica que un href o un puerto malformado en una portada no haga perder el
+resto de los enlaces del sitio.
+
+Los tiempos se expresan también en relación a una carga de calibración fija, para poder
+compararlos entre máquinas; cada tiempo es la mediana de las repeticiones, y la calibración
+se mide a lo largo de toda la corrida. Se comparan con
+benchmarks/referencia_pipeline.json y el script termina con error si alguna etapa que tarda
+al menos SEGUNDOS_MINIMOS_REGRESION en la referencia empeora más que el umbral (las más
+cortas se informan, pero su ruido supera el umbral).
+
+Las fixtures se leen de benchmarks/fixtures/ (se graban con --grabar, que sí usa la red y,
+si está ZHIPU_API_KEY, la IA). Si no hay fixtures grabadas, se generan portadas y
+artículos sintéticos con una semilla fija.
+
+Uso:
+    python benchmarks/pipeline.py [--tamanos 1000,10000,100000] [--repeticiones 5]
+                                  [--umbral 0.3] [--actualizar-referencia]
+    python benchmarks/pipeline.py --grabar
+"""
+import argparse
+import contextlib
+import copy
+import hashlib
+import io
+import json
+import os
+import random
+import re
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+from urllib.parse import urljoin
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import protest_monitor as pm
+import pytz
+
+DIRECTORIO_BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+DIRECTORIO_FIXTURES = os.path.join(DIRECTORIO_BENCHMARKS, 'fixtures')
+RUTA_REFERENCIA = os.path.join(DIRECTORIO_BENCHMARKS, 'referencia_pipeline.json')
+
+# Fecha de referencia de la corrida simulada (las fixtures sintéticas anuncian eventos posteriores).
+FECHA_REFERENCIA = pytz.timezone('America/Argentina/Buenos_Aires').localize(datetime(2025, 6, 2, 9, 0))
+# Densidad de los eventos sintéticos: con más eventos se cubren más días, como pasa con el historial real.
+EVENTOS_POR_DIA = 12
+# Sólo se controlan las regresiones de las etapas que tardan al menos esto en la referencia: en
+# las más cortas, el ruido de la máquina (otros procesos, frecuencia de la CPU) supera el umbral.
+SEGUNDOS_MINIMOS_REGRESION = 0.5
+
+
+# --- Reemplazos locales de la red, la IA y DDGS ---
+
+def _clave_texto(texto):
+    return hashlib.sha256(pm._normalizar_texto(texto).encode('utf-8')).hexdigest()
+
+
+class SesionGrabada:
+    """Sesión HTTP que responde con las páginas grabadas (buscadas por clave_url) o con un 404."""
+
+    def __init__(self, paginas):
+        self.paginas = {pm.clave_url(url): contenido for url, contenido in paginas.items()}
+
+    def get(self, url, timeout=None, headers=None):
+        contenido = self.paginas.get(pm.clave_url(url))
+        return SimpleNamespace(status_code=200 if contenido is not None else 404,
+                               content=contenido or b'', headers={})
+
+
+class ClienteIAGrabado:
+    """Cliente de IA que contesta con respuestas enlatadas según el texto de la noticia."""
+
+    _PATRON_NOTICIA = re.compile(r'---\n    (.*?)\n    ---', re.DOTALL)
+
+    def __init__(self, eventos, horarios):
+        self.eventos = eventos
+        self.horarios = horarios
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._crear))
+
+    def _crear(self, model, messages):
+        prompt = messages[-1]['content']
+        textos = self._PATRON_NOTICIA.findall(prompt)
+        if 'hora de inicio' in prompt:
+            contenido = self.horarios.get(_clave_texto(textos[0]), 'No especificado')
+        else:
+            respuestas = [self.eventos.get(_clave_texto(texto), {"es_evento_relevante": False}) for texto in textos]
+            contenido = json.dumps(respuestas if 'noticias numeradas' in prompt else respuestas[0], ensure_ascii=False)
+        uso = SimpleNamespace(prompt_tokens=len(prompt) // 3, completion_tokens=len(contenido) // 3)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=contenido))], usage=uso)
+
+
+class DDGSGrabado:
+    """Reemplazo de DDGS: cada consulta devuelve siempre los mismos resultados grabados."""
+
+    resultados = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        return False
+
+    def text(self, query, max_results=3):
+        if not self.resultados:
+            return []
+        inicio = int(hashlib.sha1(query.encode('utf-8')).hexdigest(), 16) % len(self.resultados)
+        return [{'href': url} for url in (self.resultados[inicio:] + self.resultados[:inicio])[:max_results]]
+
+
+def instalar_reemplazos(fixtures, directorio_cache):
+    """Conecta el módulo a las fixtures y deja cachés vacíos en `directorio_cache`."""
+    pm._sesion_http = SesionGrabada(fixtures['paginas'])
+    pm._cliente_ia = ClienteIAGrabado(fixtures['respuestas_ia'], fixtures['horarios'])
+    DDGSGrabado.resultados = list(fixtures['busquedas'])
+    pm.ddgs = SimpleNamespace(DDGS=DDGSGrabado)
+    pm.limitador_ia = pm.LimitadorTasa(10 ** 9, 10 ** 12)
+    reiniciar_caches(directorio_cache)
+
+
+def reiniciar_caches(directorio_cache):
+    shutil.rmtree(directorio_cache, ignore_errors=True)
+    pm.cache_ia = pm.CacheJSON(os.path.join(directorio_cache, 'respuestas_ia.json'))
+    pm.cache_paginas = pm.CacheJSON(os.path.join(directorio_cache, 'paginas.json'))
+    pm.ahorro_por_sitio.clear()
+
+
+# --- Fixtures ---
+
+def cargar_fixtures(directorio=DIRECTORIO_FIXTURES):
+    """Lee las fixtures grabadas, o devuelve None si no hay."""
+    try:
+        with open(os.path.join(directorio, 'manifiesto.json'), 'r', encoding='utf-8') as f:
+            manifiesto = json.load(f)
+    except FileNotFoundError:
+        return None
+    paginas = {}
+    for url, archivo in manifiesto['paginas'].items():
+        with open(os.path.join(directorio, 'paginas', archivo), 'rb') as f:
+            paginas[url] = f.read()
+    return dict(manifiesto, paginas=paginas)
+
+
+def grabar_fixtures(directorio=DIRECTORIO_FIXTURES):
+    """Graba las portadas actuales y sus primeros artículos relevantes (y, con API key, las respuestas de la IA)."""
+    paginas, sitios, textos = {}, {}, {}
+    for nombre, url_base in pm.SITIOS_A_MONITOREAR.items():
+        print(f"[*] Grabando {nombre}...")
+        try:
+            response = pm.descargar(url_base, timeout=15)
+        except pm.requests.RequestException as e:
+            print(f"  [!] {e}")
+            continue
+        if response.status_code != 200:
+            continue
+        paginas[url_base] = response.content
+        sitios[nombre] = url_base
+        for url in pm.seleccionar_enlaces(response.content, nombre, url_base, pm.IndiceURLs())[:pm.MAX_ARTICULOS_POR_SITIO]:
+            try:
+                articulo = pm.descargar(url, timeout=10)
+            except pm.requests.RequestException:
+                continue
+            if articulo.status_code == 200:
+                paginas[url] = articulo.content
+                texto = pm.extraer_texto_articulo(articulo.content, pm.SELECTORES_POR_SITIO.get(nombre, {}).get('cuerpo'))
+                if texto:
+                    textos[_clave_texto(texto)] = texto
+
+    respuestas_ia = {}
+    if pm.API_KEY:
+        claves = list(textos)
+        for clave, respuesta in zip(claves, pm.analizar_noticias_con_ia([textos[c] for c in claves], FECHA_REFERENCIA)):
+            if respuesta is not None:
+                respuestas_ia[clave] = respuesta
+
+    os.makedirs(os.path.join(directorio, 'paginas'), exist_ok=True)
+    archivos = {}
+    for url, contenido in paginas.items():
+        archivos[url] = hashlib.sha1(url.encode('utf-8')).hexdigest()[:16] + '.html'
+        with open(os.path.join(directorio, 'paginas', archivos[url]), 'wb') as f:
+            f.write(contenido)
+    manifiesto = {
+        'fecha_referencia': FECHA_REFERENCIA.isoformat(),
+        'sitios': sitios,
+        'paginas': archivos,
+        'respuestas_ia': respuestas_ia,
+        'horarios': {},
+        'busquedas': [url for url in paginas if url not in sitios.values()][:10],
+    }
+    with open(os.path.join(directorio, 'manifiesto.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifiesto, f, ensure_ascii=False, indent=1)
+    print(f"[💾] {len(paginas)} páginas y {len(respuestas_ia)} respuestas de la IA grabadas en {directorio}.")
+
+
+ORGANIZACIONES = ["ATE", "CTA de los Trabajadores", "Polo Obrero", "UTEP", "SUTEBA", "CGT", "Camioneros",
+                  "La Bancaria", "UOM", "Aceiteros", "CONADU", "Docentes autoconvocados", "Jubilados",
+                  "Trabajadores del Hospital Garrahan", "Barrios de Pie", "Unidad Piquetera", "FUA",
+                  "Residentes y concurrentes", "Metrodelegados", "La Fraternidad", "AGD-UBA", "SMATA",
+                  "Trabajadores de prensa (SiPreBA)", "Asamblea de vecinos", "Movimiento Evita"]
+LUGARES = ["Congreso Nacional", "Plaza de Mayo", "Obelisco", "Ministerio de Capital Humano", "Puente Pueyrredón",
+           "Casa de Gobierno de Córdoba", "Monumento a la Bandera", "Legislatura porteña", "Plaza San Martín",
+           "Rectorado de la UBA", "Hospital Posadas", "Autopista Riccheri", "Ruta 3 y Cristianía",
+           "Secretaría de Trabajo", "Plaza Independencia de Mendoza", "Casa Rosada", "Avenida 9 de Julio",
+           "Ministerio de Economía", "Terminal de ómnibus de Rosario", "Plaza Moreno de La Plata"]
+MEDIDAS = ["Paro", "Marcha", "Movilización", "Corte de calle", "Piquete", "Acampe", "Asamblea", "Concentración"]
+MOTIVOS = ["Reclamo salarial y reapertura de paritarias", "Rechazo a los despidos en {lugar}",
+           "Defensa de la universidad pública", "Contra el ajuste en salud", "Por el pago del bono adeudado",
+           "Exigen la reincorporación de los trabajadores despedidos", "En repudio a la represión",
+           "Contra el protocolo antipiquetes", "Por aumento de emergencia para jubilados",
+           "Reclamo por alimentos para comedores populares", "Contra el cierre de {lugar}",
+           "Por condiciones dignas de trabajo y pase a planta permanente"]
+PALABRAS_RELLENO = ["gobierno", "provincia", "trabajadores", "informe", "según", "fuentes", "oficiales", "sector",
+                    "además", "recursos", "durante", "semana", "nacional", "también", "entre", "medida", "decisión",
+                    "funcionarios", "ciudad", "empresas", "datos", "sobre", "el", "la", "de", "que", "en", "los"]
+SECCIONES = ["Deportes", "Economía", "Espectáculos", "Tecnología", "Mundo", "Salud", "Turismo", "Clima"]
+
+
+def _evento_sintetico(rnd, fecha):
+    lugar = rnd.choice(LUGARES)
+    return {
+        'es_evento_relevante': True,
+        'fecha': fecha.isoformat(),
+        'horario': rnd.choice(['No especificado', f"{rnd.randint(7, 20):02d}:{rnd.choice(['00', '30'])}"]),
+        'lugar': lugar,
+        'quien': rnd.choice(ORGANIZACIONES),
+        'tipo_medida': rnd.choice(MEDIDAS),
+        'motivo': rnd.choice(MOTIVOS).format(lugar=lugar),
+    }
+
+
+def _html_pagina(titulo, cuerpo, enlaces_navegacion):
+    navegacion = "".join(f'<li><a href="/{s.lower()}/">{s}</a></li>' for s in enlaces_navegacion)
+    return (f'<!DOCTYPE html><html lang="es"><head><meta charset="utf-8"><title>{titulo}</title>'
+            f'<script>window.dataLayer = window.dataLayer || [];</script></head><body>'
+            f'<header><nav><ul>{navegacion}</ul></nav></header><main>{cuerpo}</main>'
+            f'<footer><p>Todos los derechos reservados.</p><nav><ul>{navegacion}</ul></nav></footer></body></html>').encode('utf-8')
+
+
+def generar_fixtures(semilla=0):
+    """
+    Portadas y artículos sintéticos para todos los sitios: cada portada tiene unos 150 enlaces,
+    de los que una docena son titulares con palabras clave; parte de esos artículos anuncian
+    eventos futuros (que además se repiten entre sitios) y parte son crónicas de eventos pasados.
+    """
+    rnd = random.Random(semilla)
+    fecha_inicial = FECHA_REFERENCIA.date()
+    anunciados = [_evento_sintetico(rnd, fecha_inicial + timedelta(days=rnd.randint(0, 10))) for _ in range(40)]
+    paginas, respuestas_ia, horarios, resultados_busqueda = {}, {}, {}, []
+
+    def agregar_articulo(url, titulo, parrafos, respuesta):
+        relleno = [f"{rnd.choice(SECCIONES)}: " + " ".join(rnd.choice(PALABRAS_RELLENO) for _ in range(45))
+                   for _ in range(rnd.randint(15, 30))]
+        cuerpo = (f'<article><h1>{titulo}</h1><div class="autor">Redacción</div>'
+                  + "".join(f"<p>{p}</p>" for p in parrafos + relleno) + '</article>'
+                  + '<aside>' + "".join(f'<a href="/nota/rel-{k}">Nota relacionada {k}</a>' for k in range(20)) + '</aside>')
+        paginas[url] = _html_pagina(titulo, cuerpo, SECCIONES)
+        texto = pm.extraer_texto_articulo(paginas[url])
+        if respuesta is not None:
+            respuestas_ia[_clave_texto(texto)] = respuesta
+        return texto
+
+    sitios = {}
+    for numero_sitio, (nombre, url_base) in enumerate(pm.SITIOS_A_MONITOREAR.items()):
+        sitios[nombre] = url_base
+        enlaces = []
+        for k in range(140):
+            url = urljoin(url_base, f"/{rnd.choice(SECCIONES).lower()}/nota-{numero_sitio}-{k}")
+            enlaces.append((f"{rnd.choice(SECCIONES)}: novedades de la semana número {k}", url))
+        for k in range(12):
+            evento = rnd.choice(anunciados)
+            url = urljoin(url_base, f"/politica/protesta-{numero_sitio}-{k}")
+            if k % 3 == 2:
+                titulo = f"{evento['quien']}: la marcha de ayer en {evento['lugar']} fue masiva"
+                parrafos = [f"{evento['quien']} realizó ayer una protesta en {evento['lugar']}.",
+                            f"Se movilizaron miles de personas. {evento['motivo']}."]
+                agregar_articulo(url, titulo, parrafos, {"es_evento_relevante": False})
+            else:
+                titulo = f"{evento['tipo_medida']} de {evento['quien']} en {evento['lugar']}: convocan a una movilización"
+                cuando = f"el {evento['fecha']}" + (f" a las {evento['horario']}" if evento['horario'] != 'No especificado' else "")
+                parrafos = [f"{evento['quien']} convoca a una {evento['tipo_medida'].lower()} {cuando} en {evento['lugar']}.",
+                            f"El reclamo: {evento['motivo']}. Habrá una concentración previa."]
+                texto = agregar_articulo(url, titulo, parrafos, dict(evento))
+                if k % 3 == 1:
+                    resultados_busqueda.append(url)
+                    horarios[_clave_texto(texto)] = f"{rnd.randint(7, 20):02d}:00"
+            enlaces.append((titulo, url))
+        rnd.shuffle(enlaces)
+
+        if pm.SELECTORES_POR_SITIO.get(nombre, {}).get('rss'):
+            items = "".join(f"<item><title>{titulo}</title><link>{url}</link></item>" for titulo, url in enlaces)
+            paginas[url_base] = f'<?xml version="1.0"?><rss version="2.0"><channel>{items}</channel></rss>'.encode('utf-8')
+        else:
+            cuerpo = "".join(f'<div class="nota"><a href="{url}"><h2>{titulo}</h2></a><p>Resumen</p></div>'
+                             for titulo, url in enlaces)
+            paginas[url_base] = _html_pagina(nombre, cuerpo, SECCIONES)
+
+    return {'sitios': sitios, 'paginas': paginas, 'respuestas_ia': respuestas_ia,
+            'horarios': horarios, 'busquedas': resultados_busqueda[:10]}
+
+
+def eventos_sinteticos(cantidad, semilla=0):
+    """
+    Eventos como los que devuelve la IA, `EVENTOS_POR_DIA` por día en promedio. Cada evento se
+    informa entre 1 y 3 veces con pequeñas variaciones (otra fuente, campos sin especificar,
+    palabras en otro orden), que la consolidación tiene que reconocer. Algunas fuentes son
+    notas de agenda que anuncian eventos de varios días.
+    """
+    rnd = random.Random(semilla)
+    dias = max(1, cantidad // EVENTOS_POR_DIA)
+    inicio = date(2024, 1, 1)
+    eventos = []
+    while len(eventos) < cantidad:
+        base = _evento_sintetico(rnd, inicio + timedelta(days=rnd.randrange(dias)))
+        base['quien'] += rnd.choice(['', f" seccional {rnd.randint(1, 200)}"])
+        base['lugar'] = f"{base['lugar']} {rnd.choice(['', f'altura {rnd.randint(1, 9999)}'])}".strip()
+        for _ in range(rnd.choice([1, 1, 1, 2, 2, 3])):
+            evento = dict(base, fuente=f"https://medio{rnd.randint(1, 60)}.com.ar/nota/{len(eventos)}")
+            if rnd.random() < 0.05:
+                evento['fuente'] = f"https://medio{rnd.randint(1, 5)}.com.ar/agenda/{rnd.randrange(dias // 7 + 1)}"
+            if rnd.random() < 0.3:
+                evento[rnd.choice(['horario', 'lugar', 'quien'])] = 'No especificado'
+            if rnd.random() < 0.3:
+                palabras = evento['motivo'].split()
+                rnd.shuffle(palabras)
+                evento['motivo'] = " ".join(palabras)
+            eventos.append(evento)
+    eventos = eventos[:cantidad]
+    rnd.shuffle(eventos)
+    return eventos
+
+
+# --- Medición ---
+
+# Datos de la carga de calibración (se generan la primera vez que se mide).
+_DATOS_CALIBRACION = []
+# Tiempos de la carga de calibración tomados a lo largo de la corrida (ver medir y calibrar).
+_TIEMPOS_CALIBRACION = []
+
+
+def _medir_calibracion():
+    """Una medición de una carga fija de Python puro: ordenar, serializar, comparar textos."""
+    if not _DATOS_CALIBRACION:
+        rnd = random.Random(1)
+        _DATOS_CALIBRACION.extend({'a': rnd.random(), 'b': str(rnd.random())} for _ in range(20000))
+    datos = _DATOS_CALIBRACION
+    inicio = time.perf_counter()
+    sorted(datos, key=lambda d: d['b'])
+    json.loads(json.dumps(datos))
+    sum(pm.fuzz.ratio(d['b'], e['b']) for d, e in zip(datos[:3000], datos[1:3001]))
+    _TIEMPOS_CALIBRACION.append(time.perf_counter() - inicio)
+
+
+def calibrar():
+    """
+    Segundos de la carga de calibración: la mediana de 7 mediciones nuevas y de las que tomó
+    medir antes de cada repetición. La velocidad de la máquina cambia durante la corrida
+    (frecuencia de la CPU, otros procesos), así que una sola medición al principio no sirve
+    para normalizar todas las etapas.
+    """
+    for _ in range(7):
+        _medir_calibracion()
+    return statistics.median(_TIEMPOS_CALIBRACION)
+
+
+def medir(funcion, repeticiones, preparar=None):
+    """
+    Mediana de `repeticiones` ejecuciones de `funcion(preparar())`, sin contar la preparación.
+    Antes de cada ejecución se mide también la carga de calibración.
+    """
+    tiempos = []
+    for _ in range(repeticiones):
+        argumento = preparar() if preparar else None
+        _medir_calibracion()
+        with contextlib.redirect_stdout(io.StringIO()):
+            inicio = time.perf_counter()
+            funcion(argumento)
+            tiempos.append(time.perf_counter() - inicio)
+    return statistics.median(tiempos)
+
+
+def medir_memoria(funcion):
+    """MiB que siguen ocupados por lo que devuelve `funcion()`."""
+    tracemalloc.start()
+    try:
+        resultado = funcion()
+        ocupados, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del resultado
+    return ocupados / 2 ** 20
+
+
+def verificar_fuentes(directorio_datos, etapa):
+    """
+    Verifica que fuentes.json y archivo/fuentes.json, tal como los dejó `etapa`, sean los
+    mismos que rehace reconstruir_indice.
+    """
+    almacen = pm.AlmacenEventos(directorio_datos)
+    directorio_copia = directorio_datos + '_reconstruido'
+    shutil.rmtree(directorio_copia, ignore_errors=True)
+    shutil.copytree(directorio_datos, directorio_copia)
+    reconstruido = pm.AlmacenEventos(directorio_copia)
+    reconstruido.reconstruir_indice()
+    for nombre, fuentes, fuentes_reconstruidas in (
+            ('fuentes.json', almacen.fuentes, reconstruido.fuentes),
+            ('archivo/fuentes.json', almacen.fuentes_archivadas, reconstruido.fuentes_archivadas)):
+        if fuentes != fuentes_reconstruidas:
+            raise AssertionError(f"{etapa}: {nombre} no coincide con reconstruir_indice "
+                                 f"({len(fuentes)} URLs contra {len(fuentes_reconstruidas)})")
+
+
+def verificar_enlaces_malformados():
+    """Verifica que un href o un puerto malformado en una portada no hagan perder los demás enlaces."""
+    url_base = 'https://medio.com.ar/'
+    portada = ('<html><body><a href="http://[malformed/">Paro docente el lunes</a>'
+               '<a href="/nota/paro-docente">Paro docente el lunes</a></body></html>').encode('utf-8')
+    enlaces = pm.extraer_enlaces(portada, url_base)
+    if enlaces != [('Paro docente el lunes', 'https://medio.com.ar/nota/paro-docente')]:
+        raise AssertionError(f"extraer_enlaces con un href malformado devolvió {enlaces}")
+    # Un puerto no numérico no impide canonizar la URL (se usa cruda como identidad)
+    portada = ('<html><body><a href="https://medio.com.ar:abc/nota/paro">Paro docente el lunes</a>'
+               '<a href="/nota/paro-docente">Paro docente el lunes</a></body></html>').encode('utf-8')
+    enlaces = pm.seleccionar_enlaces(portada, 'medio', url_base, pm.IndiceURLs())
+    if sorted(enlaces) != ['https://medio.com.ar/nota/paro-docente', 'https://medio.com.ar:abc/nota/paro']:
+        raise AssertionError(f"seleccionar_enlaces con un puerto malformado devolvió {enlaces}")
+
+
+def ejecutar_benchmarks(fixtures, tamanos, repeticiones, directorio):
+    resultados, memoria = {}, {}
+    directorio_cache = os.path.join(directorio, '.cache')
+    instalar_reemplazos(fixtures, directorio_cache)
+    sitios = fixtures['sitios']
+    portadas = {nombre: fixtures['paginas'][url] for nombre, url in sitios.items()}
+    articulos = [contenido for url, contenido in fixtures['paginas'].items() if url not in sitios.values()]
+
+    resultados['enlaces'] = medir(lambda _: [pm.seleccionar_enlaces(contenido, nombre, sitios[nombre], pm.IndiceURLs())
+                                             for nombre, contenido in portadas.items()], repeticiones)
+    verificar_enlaces_malformados()
+    resultados['texto'] = medir(lambda _: [pm.extraer_texto_articulo(contenido) for contenido in articulos], repeticiones)
+
+    eventos_rastreo, textos_rastreo = [], {}
+
+    def rastrear(_):
+        textos_rastreo.clear()
+        eventos_rastreo[:] = pm.monitorear_sitios(sitios, FECHA_REFERENCIA, pm.IndiceURLs(), textos_rastreo)
+
+    resultados['rastreo'] = medir(rastrear, repeticiones, preparar=lambda: reiniciar_caches(directorio_cache))
+
+    def preparar_completado():
+        reiniciar_caches(directorio_cache)
+        return pm.consolidar_eventos(copy.deepcopy(eventos_rastreo)), dict(textos_rastreo)
+
+    resultados['datos_faltantes'] = medir(lambda datos: pm.completar_datos_faltantes(datos[0], FECHA_REFERENCIA, datos[1]),
+                                          repeticiones, preparar=preparar_completado)
+
+    for cantidad in tamanos:
+        eventos = eventos_sinteticos(cantidad)
+        resultados[f'consolidacion_{cantidad}'] = medir(pm.consolidar_eventos, repeticiones,
+                                                        preparar=lambda: copy.deepcopy(eventos))
+        resultados[f'consolidacion_paralela_{cantidad}'] = medir(pm.consolidar_eventos_en_paralelo, repeticiones,
+                                                                 preparar=lambda: copy.deepcopy(eventos))
+        consolidados = pm.consolidar_eventos(copy.deepcopy(eventos))
+        paralelos = pm.consolidar_eventos_en_paralelo(copy.deepcopy(eventos), procesos=max(2, pm.PROCESOS_CONSOLIDACION))
+        if list(map(pm._evento_a_json, paralelos)) != list(map(pm._evento_a_json, consolidados)):
+            raise AssertionError(f"consolidar_eventos_en_paralelo no coincide con consolidar_eventos ({cantidad} eventos)")
+        directorio_datos = os.path.join(directorio, f'datos_{cantidad}')
+
+        def almacen_vacio():
+            shutil.rmtree(directorio_datos, ignore_errors=True)
+            return pm.AlmacenEventos(directorio_datos)
+
+        resultados[f'guardado_{cantidad}'] = medir(lambda almacen: pm.guardar_eventos_para_web(consolidados, almacen),
+                                                   repeticiones, preparar=almacen_vacio)
+
+        def guardar_un_dia(almacen):
+            evento = consolidados[len(consolidados) // 2]
+            evento['horario'] = '99:99' if evento['horario'] != '99:99' else '00:00'
+            pm.guardar_eventos_para_web(consolidados, almacen, fechas={evento['fecha']})
+
+        resultados[f'guardado_incremental_{cantidad}'] = medir(guardar_un_dia, repeticiones,
+                                                               preparar=lambda: pm.AlmacenEventos(directorio_datos))
+        verificar_fuentes(directorio_datos, f'guardado_incremental_{cantidad}')
+        resultados[f'carga_{cantidad}'] = medir(pm.cargar_historial, repeticiones,
+                                                preparar=lambda: pm.AlmacenEventos(directorio_datos))
+        memoria[cantidad] = (medir_memoria(lambda: pm.cargar_historial(pm.AlmacenEventos(directorio_datos))),
+                             medir_memoria(lambda: list(pm.AlmacenEventos(directorio_datos).iterar_eventos())))
+
+        # Se archiva todo salvo los últimos DIAS_VENTANA_ACTIVA días, como en una corrida con el historial completo
+        ultima_fecha = date.fromisoformat(max(evento['fecha'] for evento in consolidados))
+        fecha_limite = (ultima_fecha - timedelta(days=pm.DIAS_VENTANA_ACTIVA)).isoformat()
+        directorio_copia = directorio_datos + '_archivo'
+
+        def copia_del_almacen():
+            shutil.rmtree(directorio_copia, ignore_errors=True)
+            shutil.copytree(directorio_datos, directorio_copia)
+            return pm.AlmacenEventos(directorio_copia)
+
+        resultados[f'archivado_{cantidad}'] = medir(lambda almacen: almacen.archivar(fecha_limite), repeticiones,
+                                                    preparar=copia_del_almacen)
+        verificar_fuentes(directorio_copia, f'archivado_{cantidad}')
+        # Las fuentes de los eventos archivados siguen contando como procesadas
+        if pm.AlmacenEventos(directorio_copia).urls_fuente() != pm.AlmacenEventos(directorio_datos).urls_fuente():
+            raise AssertionError(f"archivado_{cantidad}: el archivado cambió las URLs de fuentes procesadas")
+    return resultados, memoria
+
+
+def comparar(resultados, calibracion, referencia, umbral):
+    """
+    Imprime la tabla de resultados y devuelve las etapas que empeoraron más que `umbral`, entre
+    las que tardan al menos SEGUNDOS_MINIMOS_REGRESION en la referencia.
+    """
+    regresiones = []
+    print(f"\n{'ETAPA':<32} {'SEGUNDOS':>10} {'RELATIVO':>10} {'REFERENCIA':>11} {'CAMBIO':>8}")
+    print("-" * 75)
+    for etapa, segundos in resultados.items():
+        relativo = segundos / calibracion
+        linea = f"{etapa:<32} {segundos:>10.4f} {relativo:>10.3f}"
+        anterior = (referencia or {}).get('etapas', {}).get(etapa)
+        if anterior:
+            cambio = relativo / anterior - 1
+            linea += f" {anterior:>11.3f} {100 * cambio:>+7.0f}%"
+            segundos_referencia = anterior * calibracion
+            if segundos_referencia < SEGUNDOS_MINIMOS_REGRESION:
+                linea += "  (no se controla)"
+            elif cambio > umbral:
+                regresiones.append(etapa)
+                linea += "  <-- regresión"
+        print(linea)
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la cadena de monitoreo sin red.")
+    parser.add_argument('--tamanos', default="1000,10000,100000",
+                        help="cantidades de eventos sintéticos para consolidar y guardar (separadas por comas)")
+    parser.add_argument('--repeticiones', type=int, default=5,
+                        help="ejecuciones de cada etapa; se toma la mediana")
+    parser.add_argument('--umbral', type=float, default=0.3,
+                        help="empeoramiento relativo tolerado respecto de la referencia (0.3 = 30%%)")
+    parser.add_argument('--actualizar-referencia', action='store_true',
+                        help="guarda los resultados como nueva referencia en lugar de compararlos")
+    parser.add_argument('--grabar', action='store_true',
+                        help="graba portadas y artículos reales en benchmarks/fixtures/ (usa la red)")
+    argumentos = parser.parse_args()
+
+    if argumentos.grabar:
+        grabar_fixtures()
+        return 0
+
+    fixtures = cargar_fixtures()
+    origen = "grabadas" if fixtures else "sintéticas"
+    fixtures = fixtures or generar_fixtures()
+    tamanos = [int(t) for t in argumentos.tamanos.split(',') if t]
+    print(f"Fixtures {origen}: {len(fixtures['sitios'])} sitios, {len(fixtures['paginas'])} páginas. "
+          f"Eventos sintéticos: {', '.join(map(str, tamanos))}.")
+
+    directorio_original = os.getcwd()
+    directorio = tempfile.mkdtemp(prefix='bench-protestas-')
+    try:
+        # guardar_eventos_para_web escribe protests.json en el directorio actual
+        os.chdir(directorio)
+        resultados, memoria = ejecutar_benchmarks(fixtures, tamanos, argumentos.repeticiones, directorio)
+    finally:
+        os.chdir(directorio_original)
+        shutil.rmtree(directorio, ignore_errors=True)
+    calibracion = calibrar()
+
+    try:
+        with open(RUTA_REFERENCIA, 'r', encoding='utf-8') as f:
+            referencia = json.load(f)
+    except FileNotFoundError:
+        referencia = None
+    print(f"Calibración: {calibracion:.3f} s (los valores relativos son múltiplos de este tiempo).")
+    regresiones = comparar(resultados, calibracion, None if argumentos.actualizar_referencia else referencia,
+                           argumentos.umbral)
+    print()
+    for cantidad, (mib_eventos, mib_diccionarios) in memoria.items():
+        print(f"Memoria de la carga de {cantidad} eventos: {mib_eventos:.1f} MiB "
+              f"({mib_diccionarios:.1f} MiB como diccionarios del JSON).")
+
+    if argumentos.actualizar_referencia or referencia is None:
+        with open(RUTA_REFERENCIA, 'w', encoding='utf-8') as f:
+            json.dump({'calibracion_segundos': round(calibracion, 4), 'fixtures': origen,
+                       'etapas': {etapa: round(segundos / calibracion, 4) for etapa, segundos in resultados.items()}},
+                      f, ensure_ascii=False, indent=1)
+            f.write("\n")
+        print(f"\nReferencia guardada en {RUTA_REFERENCIA}.")
+    elif regresiones:
+        print(f"\n[!] {len(regresiones)} etapas empeoraron más de {100 * argumentos.umbral:.0f}%: {', '.join(regresiones)}")
+        return 1
+    else:
+        print(f"\nSin regresiones mayores a {100 * argumentos.umbral:.0f}%.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
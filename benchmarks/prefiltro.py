@@ -0,0 +1,136 @@
+"""
+Cómo se comporta el prefiltro local con datos que no se escribieron a partir de sus
+expresiones regulares.
+
+- Textos etiquetados (benchmarks/prefiltro_etiquetado.jsonl): anuncios y notas que no son
+  anuncios (crónicas, política, economía, opinión), redactados como en la prensa y
+  marcados a mano como relevantes o no. Se informan la exhaustividad (anuncios que pasan) y
+  la precisión, y los textos mal clasificados. Los descartes del prefiltro se marcan como
+  analizados, así que la exhaustividad es lo que decide si conviene activarlo.
+- Titulares de las fuentes guardadas: los artículos originales no se guardan, pero las URLs
+  de las fuentes de los eventos llevan el titular en la ruta ("paro-docente-el-lunes-..."),
+  y todos esos artículos la IA los consideró relevantes. Se informa cuántos titulares
+  reconocen los filtros que se aplican a los titulares de las portadas (KEYWORDS y el
+  vocabulario de protesta), cuántos tienen marcas de crónica pasada, que el prefiltro
+  penaliza aunque sean anuncios reales, y cuántos pasarían el prefiltro con el titular solo.
+  Esto último es una cota inferior: el prefiltro se aplica al texto completo, que casi
+  siempre trae la fecha, y los titulares de las URLs no tienen acentos, así que no se
+  reconocen los verbos en futuro.
+- Artículos grabados: si hay fixtures grabadas con `python benchmarks/pipeline.py --grabar`
+  y ZHIPU_API_KEY, se comparan las decisiones del prefiltro con las de la IA sobre el texto
+  de cada artículo (precisión y exhaustividad de lo que se envía a la IA).
+
+También se informa la velocidad de evaluación.
+
+Uso: python benchmarks/prefiltro.py
+"""
+import json
+import os
+import re
+import sys
+import time
+from urllib.parse import unquote, urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import protest_monitor as pm
+from pipeline import _clave_texto, cargar_fixtures
+
+RUTA_ETIQUETADOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'prefiltro_etiquetado.jsonl')
+# Partes de la ruta que no son palabras del titular: identificadores numéricos o hexadecimales.
+_PATRON_IDENTIFICADOR = re.compile(r'(?:n|nid)?\d{4,}|[0-9a-f]{8,}')
+_PATRON_EXTENSION = re.compile(r'\.(?:html?|php|aspx?)$')
+# Los titulares de menos palabras suelen ser secciones o códigos, no titulares.
+MIN_PALABRAS_TITULAR = 4
+
+
+def titular_de_url(url):
+    """El titular que lleva la ruta de la URL (la parte con más guiones), en minúsculas, o ''."""
+    partes = [parte for parte in unquote(urlparse(url).path).split('/') if parte]
+    ruta = _PATRON_EXTENSION.sub('', max(partes, key=lambda parte: parte.count('-'), default=''))
+    palabras = [palabra for palabra in re.split(r'[-_+]', ruta.lower())
+                if palabra and not _PATRON_IDENTIFICADOR.fullmatch(palabra)]
+    return " ".join(palabras) if len(palabras) >= MIN_PALABRAS_TITULAR else ''
+
+
+def _porcentaje(parte, total):
+    return f"{parte}/{total} ({100 * parte / max(1, total):.1f}%)"
+
+
+def _informar(etiquetados):
+    """Exhaustividad y precisión del prefiltro sobre pares (texto, relevante)."""
+    relevantes = sum(1 for _, relevante in etiquetados if relevante)
+    pasan = [(texto, relevante) for texto, relevante in etiquetados if pm.pasa_prefiltro(texto)]
+    verdaderos_positivos = sum(1 for _, relevante in pasan if relevante)
+    print(f"  Relevantes que pasan (exhaustividad): {_porcentaje(verdaderos_positivos, relevantes)}")
+    print(f"  Pasan y son relevantes (precisión): {_porcentaje(verdaderos_positivos, len(pasan))}")
+    print(f"  No relevantes descartados antes de la IA: "
+          f"{_porcentaje(len(etiquetados) - relevantes - (len(pasan) - verdaderos_positivos), len(etiquetados) - relevantes)}")
+
+
+def evaluar_etiquetados(ruta=RUTA_ETIQUETADOS):
+    with open(ruta, 'r', encoding='utf-8') as f:
+        etiquetados = [(datos['texto'], datos['relevante']) for datos in map(json.loads, f) if datos]
+    print(f"Textos etiquetados: {len(etiquetados)} ({sum(1 for _, relevante in etiquetados if relevante)} relevantes)")
+    _informar(etiquetados)
+    for texto, relevante in etiquetados:
+        if pm.pasa_prefiltro(texto) != relevante:
+            print(f"  {'[-] Descartado' if relevante else '[+] Pasa'} {pm.evaluar_texto(texto)}: {texto[:90]}...")
+
+
+def evaluar_titulares(urls):
+    titulares = [titular for titular in map(titular_de_url, sorted(urls)) if titular]
+    if not titulares:
+        print("No hay fuentes guardadas con el titular en la URL.")
+        return
+
+    inicio = time.perf_counter()
+    evaluaciones = [pm.evaluar_texto(titular) for titular in titulares]
+    segundos = time.perf_counter() - inicio
+    con_keyword = sum(1 for titular in titulares if pm.contiene_keyword(titular))
+    con_vocabulario = sum(1 for protesta, _, _ in evaluaciones if protesta > 0)
+    con_pasado = sum(1 for _, _, pasado in evaluaciones if pasado > 0)
+    pasan = sum(1 for titular in titulares if pm.pasa_prefiltro(titular))
+
+    print(f"\nTitulares de fuentes guardadas (todas relevantes según la IA): {len(titulares)} de {len(urls)} URLs")
+    print(f"  Con alguna KEYWORD (filtro de enlaces de las portadas): {_porcentaje(con_keyword, len(titulares))}")
+    print(f"  Con vocabulario de protesta: {_porcentaje(con_vocabulario, len(titulares))}")
+    print(f"  Con marcas de crónica pasada: {_porcentaje(con_pasado, len(titulares))}")
+    print(f"  Pasan el prefiltro con el titular solo (cota inferior): {_porcentaje(pasan, len(titulares))}")
+    print(f"  Velocidad: {len(titulares) / segundos:.0f} titulares/s")
+
+
+def evaluar_articulos(fixtures):
+    """Compara el prefiltro con la IA en los artículos grabados que tienen respuesta."""
+    hosts = {urlparse(url).netloc: nombre for nombre, url in fixtures['sitios'].items()}
+    etiquetados = []
+    for url, contenido in fixtures['paginas'].items():
+        nombre = hosts.get(urlparse(url).netloc)
+        if url in fixtures['sitios'].values():
+            continue
+        texto = pm.extraer_texto_articulo(contenido, pm.SELECTORES_POR_SITIO.get(nombre, {}).get('cuerpo'))
+        respuesta = fixtures['respuestas_ia'].get(_clave_texto(texto)) if texto else None
+        if respuesta is not None:
+            etiquetados.append((texto, bool(respuesta.get('es_evento_relevante'))))
+    if not etiquetados:
+        print("\nLas fixtures grabadas no tienen respuestas de la IA (se graban con ZHIPU_API_KEY).")
+        return
+
+    relevantes = sum(1 for _, relevante in etiquetados if relevante)
+    print(f"\nArtículos grabados con respuesta de la IA: {len(etiquetados)} ({relevantes} relevantes)")
+    _informar(etiquetados)
+
+
+def main():
+    evaluar_etiquetados()
+    evaluar_titulares(pm.AlmacenEventos().urls_fuente())
+    fixtures = cargar_fixtures()
+    if fixtures is None:
+        print("\nNo hay artículos grabados: con `python benchmarks/pipeline.py --grabar` y ZHIPU_API_KEY "
+              "se evalúa también la precisión y exhaustividad del prefiltro sobre textos reales.")
+    else:
+        evaluar_articulos(fixtures)
+
+
+if __name__ == "__main__":
+    main()
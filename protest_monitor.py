@@ -1,12 +1,59 @@
-import requests
-from bs4 import BeautifulSoup
-import zhipuai
-from datetime import datetime
+from datetime import date, datetime, timedelta
+import argparse
+import base64
+import collections
+import contextlib
+import functools
+import gzip
+import hashlib
+import heapq
+import importlib
 import json
+import locale
+import operator
 import os
-from thefuzz import fuzz
+import random
+import re
+import signal
+import sys
+import threading
+import time
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait
+from urllib.parse import parse_qsl, urlencode, urljoin, urlparse, urlunparse
 import pytz
-from ddgs import DDGS
+
+
+class _ModuloDiferido:
+    """
+    Ocupa el lugar de un módulo pesado y lo importa recién la primera vez que se usa alguno
+    de sus atributos. Desde ese momento el nombre global apunta directamente al módulo.
+    """
+
+    def __init__(self, nombre, alias):
+        self._nombre = nombre
+        self._alias = alias
+
+    def __getattr__(self, atributo):
+        modulo = importlib.import_module(self._nombre)
+        if globals().get(self._alias) is self:
+            globals()[self._alias] = modulo
+        return getattr(modulo, atributo)
+
+
+# La IA, la búsqueda web, la comparación de textos y el rastreo cargan sus dependencias
+# cuando la corrida llega a ellos: una corrida sin artículos nuevos no paga por la IA, y
+# --reconstruir-indice no carga ninguna.
+requests = _ModuloDiferido('requests', 'requests')
+etree = _ModuloDiferido('lxml.etree', 'etree')
+lxml_html = _ModuloDiferido('lxml.html', 'lxml_html')
+zhipuai = _ModuloDiferido('zhipuai', 'zhipuai')
+fuzz = _ModuloDiferido('thefuzz.fuzz', 'fuzz')
+fuzz_utils = _ModuloDiferido('thefuzz.utils', 'fuzz_utils')
+ddgs = _ModuloDiferido('ddgs', 'ddgs')
+# Sólo se usan con PROTESTA_PERFIL.
+cProfile = _ModuloDiferido('cProfile', 'cProfile')
+pstats = _ModuloDiferido('pstats', 'pstats')
 
 # --- Configuración ---
 
@@ -35,435 +82,2573 @@ SITIOS_A_MONITOREAR = {
     "Protesta": "https://news.google.com/rss/search?q=(conflicto+OR+trabajadores)+(reclaman+OR+marchan+OR+movilizacion)+Argentina+when:1d&hl=es-419&gl=AR&ceid=AR:es-419"
 }
 
+# Límites de concurrencia del rastreo. Con PROTESTA_CONCURRENCIA=1 el rastreo es secuencial.
+MAX_CONEXIONES_GLOBALES = max(1, int(os.getenv("PROTESTA_CONCURRENCIA", "8")))
+MAX_CONEXIONES_POR_HOST = max(1, int(os.getenv("PROTESTA_CONEXIONES_POR_HOST", "2")))
+
+# Planificación de llamadas a la IA: llamadas simultáneas, cupo por minuto y reintentos ante un 429.
+MODELO_IA = "glm-4.5-flash"
+IA_CONCURRENCIA = max(1, int(os.getenv("PROTESTA_IA_CONCURRENCIA", "4")))
+IA_SOLICITUDES_POR_MINUTO = max(1, int(os.getenv("PROTESTA_IA_RPM", "30")))
+IA_TOKENS_POR_MINUTO = max(1, int(os.getenv("PROTESTA_IA_TPM", "200000")))
+IA_MAX_REINTENTOS = 4
+# Noticias cortas que se agrupan en un mismo prompt (1 = una llamada por noticia).
+IA_NOTICIAS_POR_LOTE = max(1, int(os.getenv("PROTESTA_IA_LOTE", "1")))
+IA_LARGO_NOTICIA_CORTA = 1500
+# Artículos nuevos que se analizan como máximo por sitio en cada corrida.
+MAX_ARTICULOS_POR_SITIO = max(1, int(os.getenv("PROTESTA_ARTICULOS_POR_SITIO", "5")))
+# Modo demonio (--demonio): consultas de portadas por hora repartidas entre todos los sitios
+# (por defecto, una por sitio, lo mismo que la corrida horaria) y límites del intervalo de cada sitio.
+DEMONIO_CONSULTAS_POR_HORA = max(1.0, float(os.getenv("PROTESTA_CONSULTAS_POR_HORA", str(len(SITIOS_A_MONITOREAR)))))
+DEMONIO_INTERVALO_MINIMO = max(60, int(os.getenv("PROTESTA_INTERVALO_MINIMO", "300")))
+DEMONIO_INTERVALO_MAXIMO = max(DEMONIO_INTERVALO_MINIMO, int(os.getenv("PROTESTA_INTERVALO_MAXIMO", str(6 * 3600))))
+# Procesos para consolidar backfills grandes (--backfill); por defecto, uno por núcleo.
+# Con menos de MIN_EVENTOS_EN_PARALELO eventos se consolida en serie.
+PROCESOS_CONSOLIDACION = max(1, int(os.getenv("PROTESTA_PROCESOS", str(os.cpu_count() or 1))))
+MIN_EVENTOS_EN_PARALELO = 5000
+# Búsquedas web simultáneas para completar horarios faltantes y tiempo total que se les dedica.
+BUSQUEDA_CONCURRENCIA = max(1, int(os.getenv("PROTESTA_BUSQUEDA_CONCURRENCIA", "4")))
+PRESUPUESTO_BUSQUEDA_SEGUNDOS = float(os.getenv("PROTESTA_PRESUPUESTO_BUSQUEDA", "120"))
+
+HEADERS = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.36'}
+
+# Prefiltro local: descarta antes de la IA los artículos sin ninguna referencia a una fecha
+# u hora futura (crónicas de marchas que ya ocurrieron). Los descartados se marcan como
+# analizados, así que un falso negativo se pierde; por eso está desactivado por defecto y se
+# activa con PROTESTA_PREFILTRO=1 (ver benchmarks/prefiltro.py para su exhaustividad).
+PREFILTRO_ACTIVO = os.getenv("PROTESTA_PREFILTRO", "0") == "1"
+
+# Selectores XPath por sitio (mismas claves que SITIOS_A_MONITOREAR), para los sitios cuya
+# estructura no resuelve bien la heurística general:
+#   "enlaces": elementos <a> de la portada entre los que se buscan titulares relevantes.
+#   "cuerpo": contenedor del texto en los artículos del sitio.
+#   "rss": la portada es un feed RSS (se leen <item><title>/<link>).
+SELECTORES_POR_SITIO = {
+    "Protesta": {"rss": True},
+}
+
+# Contenedores del texto de un artículo que se prueban en orden si el sitio no define "cuerpo".
+XPATH_CUERPO_POR_DEFECTO = (
+    '//article',
+    '//div[contains(@class, "content")]',
+    '//div[contains(@class, "post")]',
+)
+
+# De cada artículo sólo se usan los primeros caracteres (ver _normalizar_texto).
+LARGO_MAXIMO_TEXTO = 4000
+
 # Palabras clave para identificar noticias relevantes en los titulares
 KEYWORDS = ["protesta", "movilización", "corte", "piquete", "acampe", "paro", "reclamo", "manifestación", "gremial", "sindical", "marcha", "concentración", "asamblea", "repudio", "huelga"]
 
-# --- Cerebro del Robot (Análisis con IA) ---
+# Almacenamiento de eventos: un archivo JSON por día más un índice (ver AlmacenEventos).
+DIRECTORIO_DATOS = "data"
+# Los meses que terminaron hace más de estos días se archivan comprimidos y ya no se cargan en cada corrida.
+DIAS_VENTANA_ACTIVA = max(1, int(os.getenv("PROTESTA_DIAS_ACTIVOS", "60")))
+# Export completo que se mantiene por compatibilidad con consumidores externos.
+RUTA_PROTESTS_JSON = "protests.json"
 
-def analizar_noticia_con_ia(texto_noticia, fecha_referencia):
+# Directorio de cachés persistentes entre corridas (en CI lo conserva actions/cache).
+DIRECTORIO_CACHE = os.getenv("PROTESTA_CACHE_DIR", ".cache")
+
+# Versión de los prompts: cambiarla invalida las respuestas de IA guardadas en caché.
+VERSION_PROMPT = "2"
+TTL_CACHE_IA = 3 * 24 * 3600
+MAX_ENTRADAS_CACHE_IA = 5000
+TTL_CACHE_PAGINAS = 7 * 24 * 3600
+# Artículos ya analizados (aunque no fueran relevantes), para no volver a enviarlos a la IA.
+RUTA_URLS_PROCESADAS = os.path.join(DIRECTORIO_CACHE, 'urls_procesadas.txt')
+
+# Métricas de la última corrida (tiempos, descargas, IA y cachés), junto al export protests.json.
+RUTA_METRICAS = os.path.join(os.path.dirname(RUTA_PROTESTS_JSON), 'metricas.json')
+# Historial de métricas (una línea JSON por corrida), que se conserva con el resto de los cachés.
+RUTA_HISTORIAL_METRICAS = os.path.join(DIRECTORIO_CACHE, 'metricas_historial.jsonl')
+MAX_CORRIDAS_HISTORIAL = 1000
+# Con PROTESTA_PERFIL=<archivo> la corrida se ejecuta bajo cProfile y las estadísticas se guardan ahí.
+RUTA_PERFIL = os.getenv("PROTESTA_PERFIL")
+
+# --- Cachés persistentes ---
+
+def _escribir_atomico(ruta, contenido):
+    """Escribe un archivo de texto (o binario, si `contenido` es bytes) de forma atómica (archivo temporal + rename)."""
+    os.makedirs(os.path.dirname(ruta) or '.', exist_ok=True)
+    temporal = ruta + '.tmp'
+    if isinstance(contenido, bytes):
+        with open(temporal, 'wb') as f:
+            f.write(contenido)
+    else:
+        with open(temporal, 'w', encoding='utf-8') as f:
+            f.write(contenido)
+    os.replace(temporal, ruta)
+
+
+class CacheJSON:
     """
-    Usa el modelo de IA para analizar el texto de una noticia y extraer detalles del evento.
+    Caché clave/valor guardado en un archivo JSON, con vencimiento por antigüedad
+    y un máximo de entradas (se descartan las más viejas). Se carga la primera vez
+    que se usa y se escribe sólo si cambió.
     """
-    try:
-        client = zhipuai.ZhipuAI(api_key=API_KEY)
-        # Formatear la fecha en español para que el modelo la entienda mejor en contexto.
-        # Si el locale 'es_ES' no está disponible en el sistema, usa un formato estándar.
+
+    def __init__(self, ruta, ttl_segundos=None, max_entradas=None):
+        self.ruta = ruta
+        self.ttl_segundos = ttl_segundos
+        self.max_entradas = max_entradas
+        self.aciertos = 0
+        self.fallos = 0
+        self._entradas = None
+        self._modificado = False
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def clave(*partes):
+        return hashlib.sha256("\x00".join(partes).encode('utf-8')).hexdigest()
+
+    def _cargar(self):
+        if self._entradas is not None:
+            return
+        self._entradas = {}
         try:
-            import locale
-            locale.setlocale(locale.LC_TIME, 'es_ES.UTF-8')
-            fecha_actual_para_prompt = fecha_referencia.strftime("%A %d de %B de %Y")
-        except locale.Error:
-            fecha_actual_para_prompt = fecha_referencia.strftime("%Y-%m-%d")
-
-        prompt = f"""
-        Eres un asistente de IA experto en lucha de clases en Argentina, tu misión exclusiva es monitorear protestas e informarlo en tiempo real.
-        Analiza el siguiente texto de una noticia. La fecha de referencia es {fecha_actual_para_prompt}. Tu tarea es actuar como un detective de información y descubrir si el texto describe un evento de protesta (movilización, corte, marcha, etc.) que vaya a ocurrir en el futuro (incluyendo más tarde el mismo día de la referencia).
-
-        Si encuentras un evento futuro, tu objetivo es rellenar TODOS los campos del siguiente JSON. Sé proactivo: infiere la información del contexto si no es explícita. Es crucial que intentes completar todos los campos.
-
-        Formato de salida OBLIGATORIO (JSON):
-        {{
-          "es_evento_relevante": true,
-          "fecha": "YYYY-MM-DD",
-          "horario": "HH:MM",
-          "lugar": "Lugar específico del evento",
-          "quien": "Grupo, sindicato o colectivo que organiza",
-          "tipo_medida": "Tipo de medida (ej: Paro, Marcha, Movilización, Piquete, Acampe)",
-          "motivo": "Resumen conciso del reclamo"
-        }}
-
-        REGLAS ESTRICTAS:
-        1.  **FECHA**: La fecha del evento debe ser en formato YYYY-MM-DD. Usa la fecha de referencia para calcular fechas relativas como "mañana" o "el próximo lunes".
-        2.  **TIPO DE MEDIDA**: Identifica la naturaleza de la protesta. ¿Es un "Paro" de actividades? ¿Una "Marcha" hacia un lugar? ¿Un "Piquete" o "Corte" de calle? Sé específico.
-        3.  **PERSISTENCIA**: No te rindas fácilmente. Si un dato no es obvio, reléelo y trata de inferirlo. Por ejemplo, si dice "el gremio de camioneros", `quien` es "Camioneros". Si dice "frente al Congreso", `lugar` es "Congreso Nacional".
-        4.  **NO ESPECIFICADO**: Usa "No especificado" como ÚLTIMO RECURSO, y solo si es absolutamente imposible deducir la información. Prioriza siempre dar un dato, aunque sea aproximado.
-        5.  **EVENTOS PASADOS**: Si el texto habla de un evento que ya ocurrió (ej: "la marcha de ayer fue masiva"), ignóralo y devuelve `{{"es_evento_relevante": false}}`.
-
-        Si el texto no contiene información sobre una protesta futura, devuelve `{{"es_evento_relevante": false}}`.
-
-        DEVUELVE ÚNICA Y EXCLUSIVAMENTE EL OBJETO JSON SOLICITADO, SIN EXPLICACIONES, COMENTARIOS O CUALQUIER OTRO TEXTO ADICIONAL.
-
-        Texto de la noticia a analizar:
-        ---
-        {texto_noticia[:4000]}
-        ---
+            with open(self.ruta, 'r', encoding='utf-8') as f:
+                self._entradas = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return
+        if self.ttl_segundos is not None:
+            limite = time.time() - self.ttl_segundos
+            vigentes = {k: v for k, v in self._entradas.items() if v.get('t', 0) >= limite}
+            self._modificado = len(vigentes) != len(self._entradas)
+            self._entradas = vigentes
+
+    def obtener(self, clave):
+        with self._lock:
+            self._cargar()
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                self.fallos += 1
+                return None
+            self.aciertos += 1
+            return entrada['v']
+
+    def guardar(self, clave, valor):
+        with self._lock:
+            self._cargar()
+            self._entradas[clave] = {'t': time.time(), 'v': valor}
+            self._modificado = True
+
+    def persistir(self):
+        with self._lock:
+            if not self._modificado:
+                return
+            if self.max_entradas is not None and len(self._entradas) > self.max_entradas:
+                recientes = sorted(self._entradas.items(), key=lambda item: item[1].get('t', 0))[-self.max_entradas:]
+                self._entradas = dict(recientes)
+            try:
+                _escribir_atomico(self.ruta, json.dumps(self._entradas, ensure_ascii=False))
+                self._modificado = False
+            except OSError as e:
+                print(f"[!] No se pudo guardar el caché {self.ruta}: {e}")
+
+    def tasa_aciertos(self):
+        consultas = self.aciertos + self.fallos
+        return self.aciertos / consultas if consultas else 0
+
+    def resumen(self):
+        return f"{self.aciertos} aciertos, {self.fallos} fallos ({100 * self.tasa_aciertos():.0f}%)"
+
+
+# Respuestas de la IA indexadas por hash del texto normalizado, la fecha de referencia y la versión del prompt.
+cache_ia = CacheJSON(os.path.join(DIRECTORIO_CACHE, 'respuestas_ia.json'),
+                     ttl_segundos=TTL_CACHE_IA, max_entradas=MAX_ENTRADAS_CACHE_IA)
+
+
+# Validadores HTTP (ETag/Last-Modified) y hash de cada portada, con los enlaces que quedaron sin analizar.
+cache_paginas = CacheJSON(os.path.join(DIRECTORIO_CACHE, 'paginas.json'), ttl_segundos=TTL_CACHE_PAGINAS)
+
+# Bytes y segundos ahorrados por sitio gracias a cache_paginas en esta corrida.
+ahorro_por_sitio = {}
+
+
+def _normalizar_texto(texto):
+    """Colapsa espacios y recorta al tamaño que se envía a la IA."""
+    return " ".join(texto.split())[:LARGO_MAXIMO_TEXTO]
+
+
+# --- Métricas de la corrida ---
+
+def _resumen_latencias(segundos):
+    ordenados = sorted(segundos)
+    if not ordenados:
+        return {'cantidad': 0}
+
+    def percentil(fraccion):
+        return round(ordenados[min(len(ordenados) - 1, int(fraccion * len(ordenados)))], 3)
+
+    return {'cantidad': len(ordenados), 'total': round(sum(ordenados), 3),
+            'p50': percentil(0.5), 'p95': percentil(0.95), 'max': round(ordenados[-1], 3)}
+
+
+class MetricasCorrida:
+    """
+    Cronómetros y contadores de una corrida, seguros entre hilos:
+
+    - `etapa(nombre)`: segundos de cada etapa (rastreo, análisis con IA, consolidación...).
+    - `sitio(nombre)`: segundos por sitio; los pedidos HTTP que se hagan dentro del bloque
+      (en el mismo hilo) se cuentan también para ese sitio.
+    - `registrar_pedido`, `registrar_ia` y `contar`: pedidos y bytes descargados, latencia
+      y tokens de la IA y contadores sueltos.
+
+    `guardar` escribe el resumen en RUTA_METRICAS, con las tasas de acierto de los cachés,
+    y lo agrega al historial de corridas.
+    """
+
+    def __init__(self):
+        self.inicio = datetime.now(pytz.timezone('America/Argentina/Buenos_Aires')).isoformat()
+        self._inicio_monotonico = time.monotonic()
+        self.etapas = {}
+        self.sitios = {}
+        self.contadores = collections.Counter()
+        self._http_estados = collections.Counter()
+        self._http_bytes = 0
+        self._http_segundos = []
+        self._ia_resultados = collections.Counter()
+        self._ia_segundos = []
+        self._ia_espera = 0.0
+        self._ia_tokens = collections.Counter()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _datos_sitio(self, nombre):
+        return self.sitios.setdefault(nombre, {'segundos': 0.0, 'pedidos': 0, 'bytes': 0, 'segundos_http': 0.0})
+
+    @contextlib.contextmanager
+    def etapa(self, nombre):
+        inicio = time.monotonic()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.etapas[nombre] = self.etapas.get(nombre, 0.0) + time.monotonic() - inicio
+
+    @contextlib.contextmanager
+    def sitio(self, nombre):
+        anterior = getattr(self._local, 'sitio', None)
+        self._local.sitio = nombre
+        inicio = time.monotonic()
+        try:
+            yield
+        finally:
+            self._local.sitio = anterior
+            with self._lock:
+                self._datos_sitio(nombre)['segundos'] += time.monotonic() - inicio
+
+    def registrar_pedido(self, estado, bytes_recibidos, segundos):
+        """Un pedido HTTP; `estado` es el código de respuesta, o None si el pedido falló."""
+        sitio = getattr(self._local, 'sitio', None)
+        with self._lock:
+            self._http_estados[str(estado) if estado else 'error'] += 1
+            self._http_bytes += bytes_recibidos
+            self._http_segundos.append(segundos)
+            if sitio is not None:
+                datos = self._datos_sitio(sitio)
+                datos['pedidos'] += 1
+                datos['bytes'] += bytes_recibidos
+                datos['segundos_http'] += segundos
+
+    def registrar_ia(self, segundos, segundos_espera, tokens_estimados, uso=None, resultado='ok'):
+        """
+        Una llamada a la IA: duración, espera por el cupo, tokens estimados y, si la respuesta
+        los informa (`response.usage`), tokens reales. `resultado` es 'ok', '429' o 'error'.
         """
+        with self._lock:
+            self._ia_resultados[resultado] += 1
+            self._ia_segundos.append(segundos)
+            self._ia_espera += segundos_espera
+            self._ia_tokens['estimados'] += tokens_estimados
+            self._ia_tokens['prompt'] += getattr(uso, 'prompt_tokens', 0) or 0
+            self._ia_tokens['respuesta'] += getattr(uso, 'completion_tokens', 0) or 0
 
-        response = client.chat.completions.create(
-            model="glm-4.5-flash", # Usando el modelo especificado
-            messages=[
-                {"role": "user", "content": prompt}
-            ],
-        )
-        
-        contenido_respuesta = response.choices[0].message.content
-        # Intentamos extraer el bloque JSON de forma más robusta.
-        import re
+    def contar(self, nombre, cantidad=1):
+        with self._lock:
+            self.contadores[nombre] += cantidad
+
+    def resumen(self):
+        with self._lock:
+            return {
+                'inicio': self.inicio,
+                'segundos_total': round(time.monotonic() - self._inicio_monotonico, 3),
+                'etapas': {nombre: round(segundos, 3) for nombre, segundos in self.etapas.items()},
+                'sitios': {nombre: {clave: round(valor, 3) for clave, valor in datos.items()}
+                           for nombre, datos in sorted(self.sitios.items())},
+                'http': {
+                    'pedidos': sum(self._http_estados.values()),
+                    'bytes': self._http_bytes,
+                    'por_estado': dict(sorted(self._http_estados.items())),
+                    'latencia': _resumen_latencias(self._http_segundos),
+                },
+                'ia': {
+                    'llamadas': dict(sorted(self._ia_resultados.items())),
+                    'latencia': _resumen_latencias(self._ia_segundos),
+                    'segundos_espera_cupo': round(self._ia_espera, 3),
+                    'tokens': dict(sorted(self._ia_tokens.items())),
+                },
+                'caches': {
+                    'ia': {'aciertos': cache_ia.aciertos, 'fallos': cache_ia.fallos,
+                           'tasa': round(cache_ia.tasa_aciertos(), 3)},
+                    'paginas': {'aciertos': cache_paginas.aciertos, 'fallos': cache_paginas.fallos,
+                                'tasa': round(cache_paginas.tasa_aciertos(), 3),
+                                'portadas_sin_cambios': len(ahorro_por_sitio)},
+                },
+                'contadores': dict(sorted(self.contadores.items())),
+            }
+
+    def guardar(self, ruta=RUTA_METRICAS, ruta_historial=RUTA_HISTORIAL_METRICAS):
+        """Escribe el resumen de la corrida y lo agrega al historial. Devuelve el resumen."""
+        resumen = self.resumen()
         try:
-            # Primero, busca un bloque de código JSON explícito.
-            match = re.search(r"```json\s*(\{.*?\})\s*```", contenido_respuesta, re.DOTALL)
-            if match:
-                json_str = match.group(1)
-            else:
-                # Si no lo encuentra, busca el primer objeto JSON que aparezca.
-                match = re.search(r'\{.*\}', contenido_respuesta, re.DOTALL)
-                if match:
-                    json_str = match.group(0)
-                else:
-                    raise json.JSONDecodeError("No se encontró un objeto JSON válido en la respuesta.", contenido_respuesta, 0)
-            
-            return json.loads(json_str)
-        except json.JSONDecodeError as e:
-            print(f"  [!] Error al decodificar JSON de la IA: {e} - Respuesta recibida: {contenido_respuesta}")
-            return {"es_evento_relevante": False}
+            _escribir_atomico(ruta, json.dumps(resumen, ensure_ascii=False, indent=1) + "\n")
+            try:
+                with open(ruta_historial, 'r', encoding='utf-8') as f:
+                    corridas = f.readlines()
+            except FileNotFoundError:
+                corridas = []
+            corridas.append(json.dumps(resumen, ensure_ascii=False) + "\n")
+            _escribir_atomico(ruta_historial, "".join(corridas[-MAX_CORRIDAS_HISTORIAL:]))
+        except OSError as e:
+            print(f"[!] No se pudieron guardar las métricas: {e}")
+        return resumen
 
-    except Exception as e:
-        print(f"  [!] Error al analizar con la IA: {e}")
-        return {"es_evento_relevante": False}
 
+metricas = MetricasCorrida()
 
-# --- Web Scraper ---
 
-def obtener_texto_articulo(url):
+# --- Prefiltro local ---
+
+def _sin_acentos(texto):
+    return unicodedata.normalize('NFKD', texto).encode('ascii', 'ignore').decode('ascii').lower()
+
+
+_DIAS = r'(?:lunes|martes|miercoles|jueves|viernes|sabado|domingo)'
+_MESES = r'(?:enero|febrero|marzo|abril|mayo|junio|julio|agosto|septiembre|setiembre|octubre|noviembre|diciembre)'
+
+# Mismo criterio que KEYWORDS (subcadenas), con una única expresión compilada.
+_PATRON_KEYWORDS = re.compile('|'.join(re.escape(keyword) for keyword in KEYWORDS))
+
+# Vocabulario de medidas de fuerza, sobre texto en minúsculas y sin acentos.
+_PATRON_PROTESTA = re.compile(
+    r'\b(?:protesta|moviliza|marcha|paro\b|paros\b|par(?:an|ar|ara|aran|ando)\b|cort(?:an|ar|ara|aran|ando)\b|huelga|corte|piquete|acampe|asamblea|plenario|concentra|'
+    r'manifesta|reclamo|jornada de lucha|retencion de tareas|trabajo a reglamento|quite de colaboracion|toma\b|'
+    r'bloqueo|banderazo|ruidazo|cacerolazo|abrazo|vigilia|olla popular|clase publica|caravana|tractorazo|acto\b|'
+    r'sentada|ocupacion|medidas? de fuerza|plan de lucha|repudio|rechazo|exig)')
+
+# Referencias a un momento futuro o a una fecha/hora concreta, sobre texto sin acentos.
+_PATRON_FUTURO = re.compile('|'.join([
+    r'\b(?:pasado )?manana\b',
+    r'\bhoy\b',
+    r'\b(?:este|esta|el|la) (?:proxim[oa] )?' + _DIAS + r'\b',
+    r'\bproxim[oa]s? (?:semana|' + _DIAS + r')\b',
+    r'\b' + _DIAS + r' \d{1,2}\b',
+    r'\b(?:todos )?los ' + _DIAS + r'\b',
+    r'\b\d{1,2} de ' + _MESES + r'\b',
+    r'\b\d{1,2}/\d{1,2}(?:/\d{2,4})?\b',
+    r'\ba las? \d{1,2}(?:[:.]\d{2})?\b',
+    r'\b\d{1,2}(?:[:.]\d{2})? ?(?:hs?|horas)\b',
+    r'\bdesde las\b',
+    r'\bconvoca',
+]))
+
+# Verbos en futuro (realizarán, marchará) y futuros irregulares (habrá, hará, tendrán, saldrá);
+# necesita los acentos del texto original.
+_PATRON_VERBO_FUTURO = re.compile(
+    r'\b(?:\w{2,}(?:ará|erá|irá|arán|erán|irán)|\w*(?:habr|har|tendr|podr|saldr|pondr|vendr|dir|sabr|querr|valdr)(?:á|án))\b',
+    re.IGNORECASE)
+
+# Marcas de crónica de algo que ya ocurrió, sobre texto sin acentos.
+_PATRON_PASADO = re.compile('|'.join([
+    r'\bayer\b',
+    r'\b(?:la semana|el mes) pasad[oa]\b',
+    r'\bel pasado ' + _DIAS + r'\b',
+    r'\bse (?:realizo|llevo a cabo|concreto|desarrollo)\b',
+    r'\b(?:marcharon|se movilizaron|realizaron|protagonizaron|encabezaron|participaron|colmaron)\b',
+    r'\bfue (?:masiva|multitudinaria|contundente)\b',
+]))
+
+
+def contiene_keyword(titulo):
+    """Indica si un titular (en minúsculas) contiene alguna de las KEYWORDS."""
+    return _PATRON_KEYWORDS.search(titulo) is not None
+
+
+def evaluar_texto(texto):
     """
-    Obtiene el texto plano de un artículo dado su URL.
+    Cuenta en un texto las menciones a medidas de fuerza, las referencias a fechas u horas
+    futuras y las marcas de crónica pasada. Devuelve (protesta, futuro, pasado).
     """
-    try:
-        headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.36'}
-        response = requests.get(url, headers=headers, timeout=10)
-        if response.status_code == 200:
-            soup = BeautifulSoup(response.content, 'html.parser')
-            # Intenta encontrar el contenido principal del artículo (esto puede necesitar ajustes por sitio)
-            cuerpo_articulo = soup.find('article') or soup.find('div', class_=lambda x: x and 'content' in x) or soup.find('div', class_=lambda x: x and 'post' in x)
-            if cuerpo_articulo:
-                parrafos = cuerpo_articulo.find_all('p')
-                return ' '.join([p.get_text() for p in parrafos])
-            else: # Fallback si no encuentra una estructura clara
-                return ' '.join([p.get_text() for p in soup.find_all('p')])
-        return None
-    except requests.RequestException as e:
-        print(f"  [!] Error al obtener el artículo {url}: {e}")
-        return None
+    normalizado = _sin_acentos(texto)
+    protesta = len(_PATRON_PROTESTA.findall(normalizado))
+    futuro = len(_PATRON_FUTURO.findall(normalizado)) + len(_PATRON_VERBO_FUTURO.findall(texto))
+    pasado = len(_PATRON_PASADO.findall(normalizado))
+    return protesta, futuro, pasado
 
 
-def monitorear_sitio(nombre_sitio, url_base, fecha_referencia, urls_procesadas):
+def puntaje_titular(titulo):
+    """Prioridad de un enlace según su titular: vocabulario de protesta y referencias al futuro."""
+    protesta, futuro, pasado = evaluar_texto(titulo)
+    return protesta + 2 * futuro - 2 * pasado
+
+
+def pasa_prefiltro(texto):
     """
-    Busca noticias relevantes en un sitio, evitando URLs ya procesadas.
+    Decide si vale la pena enviar el artículo a la IA: tiene que mencionar alguna medida de
+    fuerza y alguna fecha u hora futura. Las marcas de crónica pasada no descartan un
+    artículo (una crónica puede cerrar anunciando la próxima medida); sólo bajan la
+    prioridad de los titulares en puntaje_titular.
     """
-    print(f"[*] Monitoreando {nombre_sitio}...")
-    eventos_encontrados = []
-    urls_a_analizar = set()
+    protesta, futuro, _ = evaluar_texto(texto[:LARGO_MAXIMO_TEXTO])
+    return protesta > 0 and futuro > 0
 
-    try:
-        headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.36'}
-        response = requests.get(url_base, headers=headers, timeout=15)
-        if response.status_code != 200:
-            print(f"  [!] No se pudo acceder a {nombre_sitio} (código: {response.status_code}).")
-            return []
 
-        soup = BeautifulSoup(response.content, 'html.parser')
-        links = soup.find_all('a', href=True)
-
-        for link in links:
-            titulo = link.get_text().strip().lower()
-            if any(keyword in titulo for keyword in KEYWORDS):
-                url_articulo = link['href']
-                if not url_articulo.startswith('http'):
-                    from urllib.parse import urljoin
-                    url_articulo = urljoin(url_base, url_articulo)
-                
-                # La lógica clave: ignorar si ya fue procesada
-                if url_articulo not in urls_procesadas:
-                    urls_a_analizar.add(url_articulo)
-        
-        print(f"  [-] {len(urls_a_analizar)} artículos nuevos potencialmente relevantes encontrados.")
-
-        # Limitar la cantidad de nuevos artículos a analizar para no exceder cuotas/costos
-        for url in list(urls_a_analizar)[:5]:
-            print(f"  -> Analizando: {url}")
-            texto = obtener_texto_articulo(url)
-            if texto:
-                info_evento = analizar_noticia_con_ia(texto, fecha_referencia)
-                if info_evento.get("es_evento_relevante"):
-                    info_evento['fuente'] = url
-                    if info_evento.get('quien', 'No especificado') == 'No especificado':
-                        info_evento['quien'] = nombre_sitio
-                    eventos_encontrados.append(info_evento)
-                    print("    [+] Evento relevante detectado.")
-            # Marcar como procesada para no volver a intentarlo en esta misma ejecución
-            urls_procesadas.add(url)
+# --- Cerebro del Robot (Análisis con IA) ---
 
-    except Exception as e:
-        print(f"  [!] Error monitoreando {nombre_sitio}: {e}")
-    
-    return eventos_encontrados
+_PROMPT_EVENTO = """
+    Eres un asistente de IA experto en lucha de clases en Argentina, tu misión exclusiva es monitorear protestas e informarlo en tiempo real.
+    Analiza el siguiente texto de una noticia. La fecha de referencia es {fecha}. Tu tarea es actuar como un detective de información y descubrir si el texto describe un evento de protesta (movilización, corte, marcha, etc.) que vaya a ocurrir en el futuro (incluyendo más tarde el mismo día de la referencia).
 
+    Si encuentras un evento futuro, tu objetivo es rellenar TODOS los campos del siguiente JSON. Sé proactivo: infiere la información del contexto si no es explícita. Es crucial que intentes completar todos los campos.
 
+    Formato de salida OBLIGATORIO (JSON):
+    {{
+      "es_evento_relevante": true,
+      "fecha": "YYYY-MM-DD",
+      "horario": "HH:MM",
+      "lugar": "Lugar específico del evento",
+      "quien": "Grupo, sindicato o colectivo que organiza",
+      "tipo_medida": "Tipo de medida (ej: Paro, Marcha, Movilización, Piquete, Acampe)",
+      "motivo": "Resumen conciso del reclamo"
+    }}
 
-def imprimir_tabla_eventos(eventos):
-    """
-    Imprime una lista de eventos en un formato de tabla bien alineado.
-    """
-    if not eventos:
-        print("✅ No se encontraron eventos programados para hoy en los sitios monitoreados.")
-        return
+    REGLAS ESTRICTAS:
+    1.  **FECHA**: La fecha del evento debe ser en formato YYYY-MM-DD. Usa la fecha de referencia para calcular fechas relativas como "mañana" o "el próximo lunes".
+    2.  **TIPO DE MEDIDA**: Identifica la naturaleza de la protesta. ¿Es un "Paro" de actividades? ¿Una "Marcha" hacia un lugar? ¿Un "Piquete" o "Corte" de calle? Sé específico.
+    3.  **PERSISTENCIA**: No te rindas fácilmente. Si un dato no es obvio, reléelo y trata de inferirlo. Por ejemplo, si dice "el gremio de camioneros", `quien` es "Camioneros". Si dice "frente al Congreso", `lugar` es "Congreso Nacional".
+    4.  **NO ESPECIFICADO**: Usa "No especificado" como ÚLTIMO RECURSO, y solo si es absolutamente imposible deducir la información. Prioriza siempre dar un dato, aunque sea aproximado.
+    5.  **EVENTOS PASADOS**: Si el texto habla de un evento que ya ocurrió (ej: "la marcha de ayer fue masiva"), ignóralo y devuelve `{{"es_evento_relevante": false}}`.
 
-    # Definir cabeceras y claves de datos
-    cabeceras = {
-        "fecha": "FECHA",
-        "horario": "HORA",
-        "tipo_medida": "QUÉ",
-        "lugar": "LUGAR",
-        "quien": "QUIÉN",
-        "motivo": "MOTIVO"
-    }
-    claves = list(cabeceras.keys())
+    Si el texto no contiene información sobre una protesta futura, devuelve `{{"es_evento_relevante": false}}`.
+"""
 
-    # Definir anchos máximos para columnas que pueden ser muy largas
-    max_anchos = {
-        "motivo": 50,
-        "lugar": 40,
-        "quien": 30
-    }
+_PROMPT_EVENTO_INDIVIDUAL = _PROMPT_EVENTO + """
+    DEVUELVE ÚNICA Y EXCLUSIVAMENTE EL OBJETO JSON SOLICITADO, SIN EXPLICACIONES, COMENTARIOS O CUALQUIER OTRO TEXTO ADICIONAL.
 
-    # Calcular el ancho para cada columna
-    anchos = {k: len(v) for k, v in cabeceras.items()}
-    for evento in eventos:
-        for clave in claves:
-            contenido = str(evento.get(clave, '-'))
-            ancho_contenido = len(contenido)
-            if clave in max_anchos and ancho_contenido > max_anchos[clave]:
-                ancho_contenido = max_anchos[clave]
-            if ancho_contenido > anchos[clave]:
-                anchos[clave] = ancho_contenido
+    Texto de la noticia a analizar:
+    ---
+    {texto}
+    ---
+"""
 
-    # Función para truncar texto
-    def truncar(texto, ancho):
-        if len(texto) > ancho:
-            return texto[:ancho-3] + "..."
-        return texto
+_PROMPT_EVENTO_LOTE = """
+    Vas a recibir {cantidad} noticias numeradas. Aplica a CADA UNA, por separado, las siguientes instrucciones.
+""" + _PROMPT_EVENTO + """
+    DEVUELVE ÚNICA Y EXCLUSIVAMENTE UN ARRAY JSON CON EXACTAMENTE {cantidad} OBJETOS, UNO POR NOTICIA Y EN EL MISMO ORDEN, SIN EXPLICACIONES, COMENTARIOS O CUALQUIER OTRO TEXTO ADICIONAL.
 
-    # Imprimir cabecera de la tabla
-    linea_cabecera = " | ".join([cabeceras[k].ljust(anchos[k]) for k in claves])
-    print(linea_cabecera)
-    print("-" * len(linea_cabecera))
+    Noticias a analizar:
+{noticias}
+"""
 
-    # Imprimir filas de datos
-    for evento in eventos:
-        fila = []
-        for clave in claves:
-            contenido = str(evento.get(clave, '-'))
-            ancho_columna = anchos[clave]
-            if clave in max_anchos:
-                contenido_truncado = truncar(contenido, ancho_columna)
-                fila.append(contenido_truncado.ljust(ancho_columna))
-            else:
-                fila.append(contenido.ljust(ancho_columna))
-        print(" | ".join(fila))
+_PROMPT_HORARIO = """
+    Analiza el siguiente texto y dime SOLAMENTE la hora de inicio del evento de protesta. 
+    La hora debe estar en formato HH:MM. Si no encuentras una hora, responde 'No especificado'.
+    
+    Texto:
+    ---
+    {texto}
+    ---
+"""
 
-def consolidar_eventos(eventos):
+
+class LimitadorTasa:
     """
-    Consolida eventos duplicados de diferentes fuentes, 
-    combinando la información para completarla usando fuzzy string matching.
+    Limita las llamadas a la IA con una ventana deslizante de 60 segundos, tanto en
+    solicitudes como en tokens estimados. `pausar` frena a todos los hilos, por ejemplo
+    después de recibir un 429.
     """
-    eventos_consolidados = []
-    for evento_nuevo in eventos:
-        encontrado = False
-        for evento_existente in eventos_consolidados:
-            # Criterios de similitud usando thefuzz
-            lugar_ratio = fuzz.token_sort_ratio(evento_nuevo.get('lugar', ''), evento_existente.get('lugar', ''))
-            quien_ratio = fuzz.token_sort_ratio(evento_nuevo.get('quien', ''), evento_existente.get('quien', ''))
-            motivo_ratio = fuzz.token_sort_ratio(evento_nuevo.get('motivo', ''), evento_existente.get('motivo', ''))
-
-            # Considerar el mismo evento si la fecha es la misma y hay una alta similitud en lugar, quien o motivo
-            if (evento_nuevo.get('fecha') == evento_existente.get('fecha') and 
-                (lugar_ratio > 80 or quien_ratio > 80 or motivo_ratio > 85)):
-                
-                # Es el mismo evento, consolidamos la información
-                for clave in ['horario', 'lugar', 'quien', 'motivo']:
-                    if evento_existente.get(clave) == 'No especificado' and evento_nuevo.get(clave) != 'No especificado':
-                        evento_existente[clave] = evento_nuevo.get(clave)
-                
-                # Agregamos la nueva fuente a la lista de fuentes
-                if isinstance(evento_existente.get('fuente'), list):
-                    if evento_nuevo.get('fuente') not in evento_existente['fuente']:
-                        evento_existente['fuente'].append(evento_nuevo.get('fuente'))
-                else: 
-                    evento_existente['fuente'] = [evento_existente.get('fuente'), evento_nuevo.get('fuente')]
-                
-                encontrado = True
-                break
-        
-        if not encontrado:
-            eventos_consolidados.append(evento_nuevo)
-            
-    # Convertir las listas de fuentes a strings para la impresión
-    for evento in eventos_consolidados:
-        if isinstance(evento.get('fuente'), list):
-            evento['fuente'] = ", ".join(evento['fuente'])
-            
-    return eventos_consolidados
 
-def buscar_datos_faltantes(evento, fecha_referencia):
+    def __init__(self, solicitudes_por_minuto, tokens_por_minuto):
+        self.solicitudes_por_minuto = solicitudes_por_minuto
+        self.tokens_por_minuto = tokens_por_minuto
+        self._ventana = collections.deque()
+        self._pausa_hasta = 0.0
+        self._lock = threading.Lock()
+
+    def esperar(self, tokens):
+        while True:
+            with self._lock:
+                ahora = time.monotonic()
+                while self._ventana and ahora - self._ventana[0][0] >= 60:
+                    self._ventana.popleft()
+                tokens_usados = sum(t for _, t in self._ventana)
+                if ahora < self._pausa_hasta:
+                    espera = self._pausa_hasta - ahora
+                elif len(self._ventana) < self.solicitudes_por_minuto and (
+                        not self._ventana or tokens_usados + tokens <= self.tokens_por_minuto):
+                    self._ventana.append((ahora, tokens))
+                    return
+                else:
+                    espera = 60 - (ahora - self._ventana[0][0])
+            time.sleep(max(espera, 0.05))
+
+    def pausar(self, segundos):
+        with self._lock:
+            self._pausa_hasta = max(self._pausa_hasta, time.monotonic() + segundos)
+
+
+limitador_ia = LimitadorTasa(IA_SOLICITUDES_POR_MINUTO, IA_TOKENS_POR_MINUTO)
+_semaforo_ia = threading.BoundedSemaphore(IA_CONCURRENCIA)
+_cliente_ia = None
+_lock_cliente_ia = threading.Lock()
+_lock_locale = threading.Lock()
+
+
+def obtener_cliente_ia():
     """
-    Intenta encontrar datos faltantes (como el horario) para un evento 
-    realizando una búsqueda web experimental.
+    Devuelve el cliente de ZhipuAI compartido. Los reintentos los maneja `consultar_ia`.
     """
-    if evento.get('horario', 'No especificado') != 'No especificado':
-        return evento # No hay nada que buscar
+    global _cliente_ia
+    with _lock_cliente_ia:
+        if _cliente_ia is None:
+            _cliente_ia = zhipuai.ZhipuAI(api_key=API_KEY, max_retries=0)
+        return _cliente_ia
 
-    print(f"  [?] Buscando horario para el evento en '{evento.get('lugar')}'...")
-    
-    # Construir una consulta de búsqueda más natural y detallada
-    motivo_corto = ' '.join(evento.get('motivo', '').split()[:5]) # Usar las primeras 5 palabras del motivo
-    query = f"a qué hora es la protesta de {evento.get('quien', '')} en {evento.get('lugar', '')} el {evento.get('fecha', '')} por {motivo_corto}"
-    
-    try:
-        with DDGS() as ddgs:
-            resultados = list(ddgs.text(query, max_results=3))
 
-        if not resultados:
-            print("    [!] No se encontraron resultados en la búsqueda web.")
-            return evento
+def _es_limite_de_tasa(error):
+    return (isinstance(error, (zhipuai.APIReachLimitError, zhipuai.APIServerFlowExceedError))
+            or getattr(error, 'status_code', None) == 429)
 
-        for resultado in resultados:
-            url = resultado['href']
-            print(f"    -> Analizando resultado de búsqueda: {url}")
-            texto = obtener_texto_articulo(url)
-            if texto:
-                # Usamos la IA con un prompt enfocado solo en el horario
-                prompt_horario = f"""
-                Analiza el siguiente texto y dime SOLAMENTE la hora de inicio del evento de protesta. 
-                La hora debe estar en formato HH:MM. Si no encuentras una hora, responde 'No especificado'.
-                
-                Texto:
-                ---
-                {texto[:4000]}
-                ---
-                """
-                client = zhipuai.ZhipuAI(api_key=API_KEY)
-                response = client.chat.completions.create(
-                    model="glm-4.5-flash",
+
+def consultar_ia(prompt):
+    """
+    Envía un prompt al modelo respetando la concurrencia y el cupo por minuto, con
+    reintentos exponenciales ante respuestas 429. Devuelve el texto de la respuesta.
+    """
+    # Estimación gruesa: ~3 caracteres por token en español, más la respuesta.
+    tokens_estimados = len(prompt) // 3 + 300
+    for intento in range(IA_MAX_REINTENTOS + 1):
+        inicio_espera = time.monotonic()
+        limitador_ia.esperar(tokens_estimados)
+        try:
+            with _semaforo_ia:
+                inicio = time.monotonic()
+                response = obtener_cliente_ia().chat.completions.create(
+                    model=MODELO_IA,
                     messages=[
-                        {"role": "user", "content": prompt_horario}
+                        {"role": "user", "content": prompt}
                     ],
                 )
-                horario_encontrado = response.choices[0].message.content.strip()
+            metricas.registrar_ia(time.monotonic() - inicio, inicio - inicio_espera, tokens_estimados,
+                                  getattr(response, 'usage', None))
+            return response.choices[0].message.content
+        except Exception as e:
+            limite_de_tasa = _es_limite_de_tasa(e)
+            metricas.registrar_ia(time.monotonic() - inicio, inicio - inicio_espera, tokens_estimados,
+                                  resultado='429' if limite_de_tasa else 'error')
+            if not limite_de_tasa or intento == IA_MAX_REINTENTOS:
+                raise
+            espera = 2 ** intento + random.random()
+            print(f"  [~] Límite de la API alcanzado, reintentando en {espera:.1f}s...")
+            limitador_ia.pausar(espera)
 
-                if horario_encontrado != 'No especificado':
-                    print(f"      [+] ¡Horario encontrado!: {horario_encontrado}")
-                    evento['horario'] = horario_encontrado
-                    # Opcional: añadir la nueva fuente
-                    if isinstance(evento.get('fuente'), str):
-                        evento['fuente'] += ", " + url
-                    return evento # Devolvemos el evento actualizado en cuanto encontramos el dato
 
-    except Exception as e:
-        print(f"    [!] Error durante la búsqueda de datos faltantes: {e}")
+@functools.lru_cache(maxsize=None)
+def _locale_espanol():
+    """
+    Configura una sola vez LC_TIME en español (afecta a todo el proceso). Devuelve False
+    si el locale 'es_ES' no está disponible en el sistema.
+    """
+    with _lock_locale:
+        try:
+            locale.setlocale(locale.LC_TIME, 'es_ES.UTF-8')
+            return True
+        except locale.Error:
+            return False
+
+
+@functools.lru_cache(maxsize=32)
+def _fecha_en_texto(dia):
+    # Formatear la fecha en español para que el modelo la entienda mejor en contexto.
+    # Si el locale 'es_ES' no está disponible en el sistema, usa un formato estándar.
+    if _locale_espanol():
+        return dia.strftime("%A %d de %B de %Y")
+    return dia.strftime("%Y-%m-%d")
+
+
+def _fecha_para_prompt(fecha_referencia):
+    return _fecha_en_texto(fecha_referencia.date())
 
-    return evento
 
+# Bloque ```json explícito y, si no lo hay, desde la primera apertura hasta el último cierre.
+_PATRONES_JSON = {
+    es_lista: (re.compile(rf"```json\s*({apertura}.*?{cierre})\s*```", re.DOTALL),
+               re.compile(rf'{apertura}.*{cierre}', re.DOTALL))
+    for es_lista, (apertura, cierre) in ((False, (r'\{', r'\}')), (True, (r'\[', r'\]')))
+}
 
 
-def guardar_eventos_para_web(todos_los_eventos):
+def _extraer_json(contenido_respuesta, es_lista=False):
     """
-    Guarda todos los eventos consolidados en un único archivo JSON para la web.
+    Extrae el bloque JSON de la respuesta del modelo de forma robusta.
     """
-    # Estructura final para el JSON
-    output_data = {
-        "last_updated": datetime.now(pytz.timezone('America/Argentina/Buenos_Aires')).isoformat(),
-        "events": todos_los_eventos
-    }
+    patron_bloque, patron_suelto = _PATRONES_JSON[es_lista]
+    # Primero, busca un bloque de código JSON explícito.
+    match = patron_bloque.search(contenido_respuesta)
+    if match:
+        json_str = match.group(1)
+    else:
+        # Si no lo encuentra, busca el primer objeto JSON que aparezca.
+        match = patron_suelto.search(contenido_respuesta)
+        if match:
+            json_str = match.group(0)
+        else:
+            raise json.JSONDecodeError("No se encontró un objeto JSON válido en la respuesta.", contenido_respuesta, 0)
+    return json.loads(json_str)
 
+
+def _analizar_una(texto_noticia, fecha_para_prompt):
+    """Analiza una noticia. Devuelve el objeto de la IA, o None si la llamada falló."""
     try:
-        with open('protests.json', 'w', encoding='utf-8') as f:
-            json.dump(output_data, f, ensure_ascii=False, indent=4)
-        print("\n[💾] Base de datos de eventos guardada correctamente en protests.json.")
+        contenido_respuesta = consultar_ia(_PROMPT_EVENTO_INDIVIDUAL.format(fecha=fecha_para_prompt, texto=texto_noticia))
     except Exception as e:
-        print(f"\n[!] Error al guardar el archivo JSON: {e}")
+        print(f"  [!] Error al analizar con la IA: {e}")
+        return None
+    try:
+        resultado = _extraer_json(contenido_respuesta)
+    except json.JSONDecodeError as e:
+        print(f"  [!] Error al decodificar JSON de la IA: {e} - Respuesta recibida: {contenido_respuesta}")
+        return None
+    return resultado if isinstance(resultado, dict) else None
 
-def get_processed_urls(eventos):
-    """Extrae todas las URLs de fuentes de una lista de eventos."""
-    urls = set()
-    for evento in eventos:
-        fuente = evento.get('fuente')
-        if not fuente:
-            continue
-        
-        if isinstance(fuente, list):
-            for url in fuente:
-                urls.add(url)
-        elif isinstance(fuente, str):
-            # Las fuentes pueden ser un string de URLs separadas por coma
-            urls.update(u.strip() for u in fuente.split(','))
-    return urls
 
-def main():
-    # Configurar la zona horaria de Argentina
+def _analizar_lote(textos, fecha_para_prompt):
+    """
+    Analiza varias noticias cortas con un único prompt que devuelve un array JSON.
+    Si la respuesta no trae un objeto por noticia, se analizan de a una.
+    """
+    noticias = "\n".join(f"    [{n}]\n    ---\n    {texto}\n    ---" for n, texto in enumerate(textos, 1))
+    prompt = _PROMPT_EVENTO_LOTE.format(cantidad=len(textos), fecha=fecha_para_prompt, noticias=noticias)
     try:
-        tz_argentina = pytz.timezone('America/Argentina/Buenos_Aires')
-    except pytz.UnknownTimeZoneError:
-        print("[!] No se pudo encontrar la zona horaria 'America/Argentina/Buenos_Aires'. Usando la hora local del sistema.")
-        tz_argentina = None
+        resultados = _extraer_json(consultar_ia(prompt), es_lista=True)
+        if len(resultados) == len(textos):
+            return [r if isinstance(r, dict) else None for r in resultados]
+        print(f"  [!] La IA devolvió {len(resultados)} objetos para {len(textos)} noticias; se analizan por separado.")
+    except Exception as e:
+        print(f"  [!] Error al analizar el lote con la IA: {e}; se analizan por separado.")
+    return [_analizar_una(texto, fecha_para_prompt) for texto in textos]
 
-    fecha_actual = datetime.now(tz_argentina)
-    print(f"🤖 Iniciando Robot de Monitoreo de Protestas (Hora de Argentina: {fecha_actual.strftime('%Y-%m-%d %H:%M:%S')})...")
 
-    # --- Cargar eventos históricos y URLs ya procesadas ---
-    eventos_historicos = []
-    urls_ya_procesadas = set()
-    if os.path.exists('protests.json'):
-        try:
-            with open('protests.json', 'r', encoding='utf-8') as f:
-                datos_viejos = json.load(f)
-                eventos_historicos = datos_viejos.get('events', [])
-                urls_ya_procesadas = get_processed_urls(eventos_historicos)
-            print(f"🔍 Cargados {len(eventos_historicos)} eventos del historial. Se ignorarán {len(urls_ya_procesadas)} URLs ya procesadas.")
-        except (json.JSONDecodeError, FileNotFoundError):
-            print("[!] No se encontró historial de eventos o el archivo está dañado. Se creará uno nuevo.")
-            eventos_historicos = []
+def analizar_noticias_con_ia(textos, fecha_referencia):
+    """
+    Usa el modelo de IA para analizar varias noticias y extraer detalles de sus eventos.
 
-    print(f"🗓️  Buscando nuevos eventos...")
+    Las respuestas se guardan en `cache_ia`, así que el mismo contenido no se vuelve a
+    enviar. El resto se despacha en paralelo (hasta IA_CONCURRENCIA llamadas) y, si
+    IA_NOTICIAS_POR_LOTE > 1, las noticias cortas se agrupan en un mismo prompt.
+    Devuelve un resultado por texto, en el mismo orden (None si el análisis falló).
+    """
+    textos = [_normalizar_texto(texto) for texto in textos]
+    fecha_clave = fecha_referencia.strftime("%Y-%m-%d")
+    claves = [cache_ia.clave("evento", VERSION_PROMPT, fecha_clave, texto) for texto in textos]
+    resultados = [None] * len(textos)
+    pendientes = []
+    for i, clave in enumerate(claves):
+        respuesta_cacheada = cache_ia.obtener(clave)
+        if respuesta_cacheada is not None:
+            resultados[i] = dict(respuesta_cacheada)
+        else:
+            pendientes.append(i)
 
-    eventos_nuevos = []
-    for nombre, url in SITIOS_A_MONITOREAR.items():
-        eventos_nuevos.extend(monitorear_sitio(nombre, url, fecha_actual, urls_ya_procesadas))
+    grupos = []
+    if IA_NOTICIAS_POR_LOTE > 1:
+        cortas = [i for i in pendientes if len(textos[i]) <= IA_LARGO_NOTICIA_CORTA]
+        grupos = [cortas[k:k + IA_NOTICIAS_POR_LOTE] for k in range(0, len(cortas), IA_NOTICIAS_POR_LOTE)]
+        pendientes = [i for i in pendientes if len(textos[i]) > IA_LARGO_NOTICIA_CORTA]
+    grupos.extend([i] for i in pendientes)
 
-    if not eventos_nuevos:
-        print("\n✅ No se encontraron nuevos eventos en esta corrida.")
-    else:
-        print(f"\n🔄 Consolidando {len(eventos_nuevos)} eventos nuevos con {len(eventos_historicos)} del historial...")
-    
-    # --- Consolidar y completar datos ---
-    eventos_a_consolidar = eventos_nuevos + eventos_historicos
-    eventos_consolidados = consolidar_eventos(eventos_a_consolidar)
-
-    eventos_completos = []
-    fecha_actual_str = fecha_actual.strftime("%Y-%m-%d")
-    for evento in eventos_consolidados:
-        # Solo buscar datos faltantes para eventos futuros o de hoy para no gastar API en eventos viejos
-        if evento.get('fecha', '') >= fecha_actual_str:
-            # Y solo si el evento es uno de los recién encontrados
-            if any(evento_nuevo['fuente'] in evento.get('fuente', '') for evento_nuevo in eventos_nuevos):
-                 evento_actualizado = buscar_datos_faltantes(evento, fecha_actual)
-                 eventos_completos.append(evento_actualizado)
-            else:
-                eventos_completos.append(evento)
-        else:
-            eventos_completos.append(evento)
+    fecha_para_prompt = _fecha_para_prompt(fecha_referencia)
 
-    # --- Ordenar y mostrar ---
-    eventos_completos.sort(key=lambda x: (x.get('fecha', '9999-12-31'), x.get('horario', '99:99')))
-    
-    print("\n" + "="*80)
-    print(f"FIXTURE DE PROTESTAS COMPLETO".center(80))
-    print("="*80 + "\n")
-    imprimir_tabla_eventos(eventos_completos)
+    def analizar_grupo(grupo):
+        if len(grupo) == 1:
+            return [_analizar_una(textos[grupo[0]], fecha_para_prompt)]
+        return _analizar_lote([textos[i] for i in grupo], fecha_para_prompt)
 
-    # --- GUARDAR DATOS PARA LA WEB ---
-    guardar_eventos_para_web(eventos_completos)
+    with ThreadPoolExecutor(max_workers=IA_CONCURRENCIA) as pool:
+        for grupo, respuestas in zip(grupos, pool.map(analizar_grupo, grupos)):
+            for i, resultado in zip(grupo, respuestas):
+                if resultado is not None:
+                    cache_ia.guardar(claves[i], dict(resultado))
+                resultados[i] = resultado
+    return resultados
 
-    print("\n🤖 Monitoreo finalizado.")
 
-if __name__ == "__main__":
-    main()
+def analizar_noticia_con_ia(texto_noticia, fecha_referencia):
+    """
+    Usa el modelo de IA para analizar el texto de una noticia y extraer detalles del evento.
+    """
+    return analizar_noticias_con_ia([texto_noticia], fecha_referencia)[0] or {"es_evento_relevante": False}
+
+
+def consultar_horario_con_ia(texto, respuestas_nuevas=None):
+    """
+    Pregunta a la IA sólo por la hora de inicio del evento descrito en el texto.
+    La respuesta se guarda en cache_ia o, si se pasa `respuestas_nuevas`, ahí
+    ({clave de cache_ia: horario}), para que la guarde quien llama.
+    """
+    texto = _normalizar_texto(texto)
+    clave_cache = cache_ia.clave("horario", VERSION_PROMPT, texto)
+    respuesta_cacheada = cache_ia.obtener(clave_cache)
+    if respuesta_cacheada is not None:
+        return respuesta_cacheada
+
+    # Usamos la IA con un prompt enfocado solo en el horario
+    horario = consultar_ia(_PROMPT_HORARIO.format(texto=texto)).strip()
+    if respuestas_nuevas is None:
+        cache_ia.guardar(clave_cache, horario)
+    else:
+        respuestas_nuevas[clave_cache] = horario
+    return horario
+
+
+# --- Web Scraper ---
+
+_sesion_http = None
+_lock_sesion = threading.Lock()
+_semaforo_global = threading.BoundedSemaphore(MAX_CONEXIONES_GLOBALES)
+_semaforos_por_host = {}
+
+
+def obtener_sesion_http():
+    """
+    Devuelve la sesión HTTP compartida, que mantiene conexiones keep-alive por host.
+    """
+    global _sesion_http
+    with _lock_sesion:
+        if _sesion_http is None:
+            sesion = requests.Session()
+            sesion.headers.update(HEADERS)
+            adaptador = requests.adapters.HTTPAdapter(pool_connections=len(SITIOS_A_MONITOREAR) * 2,
+                                    pool_maxsize=MAX_CONEXIONES_POR_HOST)
+            sesion.mount('http://', adaptador)
+            sesion.mount('https://', adaptador)
+            _sesion_http = sesion
+        return _sesion_http
+
+
+def _semaforo_host(url):
+    host = urlparse(url).netloc.lower()
+    with _lock_sesion:
+        if host not in _semaforos_por_host:
+            _semaforos_por_host[host] = threading.BoundedSemaphore(MAX_CONEXIONES_POR_HOST)
+        return _semaforos_por_host[host]
+
+
+def descargar(url, timeout, headers=None):
+    """
+    Descarga una URL con la sesión compartida, respetando el límite global y por host.
+    """
+    with _semaforo_global, _semaforo_host(url):
+        inicio = time.monotonic()
+        try:
+            response = obtener_sesion_http().get(url, timeout=timeout, headers=headers)
+        except requests.RequestException:
+            metricas.registrar_pedido(None, 0, time.monotonic() - inicio)
+            raise
+        metricas.registrar_pedido(response.status_code, len(response.content), time.monotonic() - inicio)
+        return response
+
+
+_avisos_hilo = threading.local()
+_lock_salida = threading.Lock()
+
+
+def avisar(mensaje):
+    """Imprime un mensaje, o lo acumula si el hilo está dentro de `avisos_agrupados`."""
+    lineas = getattr(_avisos_hilo, 'lineas', None)
+    if lineas is None:
+        print(mensaje)
+    else:
+        lineas.append(mensaje)
+
+
+@contextlib.contextmanager
+def avisos_agrupados():
+    """
+    Junta los mensajes de `avisar` del hilo actual y los imprime en un solo bloque al
+    terminar, para que los de sitios rastreados en paralelo no se mezclen en el log.
+    """
+    _avisos_hilo.lineas = []
+    try:
+        yield
+    finally:
+        lineas, _avisos_hilo.lineas = _avisos_hilo.lineas, None
+        if lineas:
+            with _lock_salida:
+                print("\n".join(lineas) + "\n", end='', flush=True)
+
+
+# --- URLs procesadas ---
+
+# Parámetros de seguimiento que no cambian el artículo al que apunta una URL.
+PARAMETROS_SEGUIMIENTO = {'fbclid', 'gclid', 'dclid', 'msclkid', 'igshid', 'mc_cid', 'mc_eid', 'ref', 'ref_src',
+                          'amp', 'outputtype', 'oc', 'cmpid', 'at_medium', 'at_campaign'}
+_PATRON_URL_EN_BYTES = re.compile(rb'https?://[\x21-\x7e]+')
+
+
+def _decodificar_google_news(url_parseada):
+    """
+    Las URLs de artículos del RSS de Google News (/rss/articles/CBMi...) llevan la URL original
+    codificada en base64. Devuelve esa URL, o None si el formato no se puede decodificar sin red.
+    """
+    partes = url_parseada.path.split('/')
+    if 'articles' not in partes or partes.index('articles') + 1 >= len(partes):
+        return None
+    codigo = partes[partes.index('articles') + 1]
+    try:
+        datos = base64.urlsafe_b64decode(codigo + '=' * (-len(codigo) % 4))
+    except (ValueError, TypeError):
+        return None
+    match = _PATRON_URL_EN_BYTES.search(datos)
+    return match.group(0).decode('ascii') if match else None
+
+
+def resolver_redireccion(url):
+    """
+    Si la URL es una redirección de Google, una copia del caché AMP o un artículo del RSS de
+    Google News, devuelve la URL del artículo al que lleva; si no, la misma URL. Es la URL
+    que se descarga y se guarda como fuente.
+    """
+    url = url.strip()
+    for _ in range(3):  # una redirección puede envolver a otra
+        try:
+            partes = urlparse(url)
+        except ValueError:
+            break
+        host = partes.netloc.lower()
+        if host in ('www.google.com', 'google.com', 'www.google.com.ar') and partes.path == '/url':
+            parametros = dict(parse_qsl(partes.query))
+            destino = parametros.get('q') or parametros.get('url')
+            if destino:
+                url = destino
+                continue
+        if host in ('www.google.com', 'google.com') and partes.path.startswith('/amp/s/'):
+            url = 'https://' + partes.path[len('/amp/s/'):]
+            continue
+        if host.endswith('.cdn.ampproject.org') and partes.path.startswith(('/c/s/', '/v/s/')):
+            url = 'https://' + partes.path[len('/c/s/'):]
+            continue
+        if host == 'news.google.com':
+            destino = _decodificar_google_news(partes)
+            if destino:
+                url = destino
+                continue
+        break
+    return url
+
+
+def canonizar_url(url):
+    """
+    Devuelve una forma canónica de la URL de un artículo, para reconocer la misma nota
+    enlazada de distintas maneras: esquema y host en minúsculas, sin puerto por defecto,
+    fragmento ni parámetros de seguimiento, sin las marcas de AMP y con las redirecciones
+    resueltas. No siempre es descargable (el host sin 'amp.' puede no existir), así que
+    sólo se usa como identidad, a través de clave_url.
+    """
+    try:
+        partes = urlparse(resolver_redireccion(url))
+        puerto = partes.port
+    except ValueError:
+        # Host o puerto malformado (https://x.com:abc/paro): la URL cruda es su propia identidad
+        return url.strip()
+    esquema = partes.scheme.lower() or 'https'
+    host = (partes.hostname or '').lower()
+    if puerto and not (esquema, puerto) in (('http', 80), ('https', 443)):
+        host = f"{host}:{puerto}"
+    if host.startswith('amp.'):
+        host = host[len('amp.'):]
+
+    ruta = partes.path or '/'
+    for sufijo in ('/amp/', '/amp', '.amp'):
+        if ruta.endswith(sufijo):
+            ruta = ruta[:-len(sufijo)] or '/'
+            break
+    ruta = ruta.replace('/amp/', '/')
+
+    parametros = sorted((clave, valor) for clave, valor in parse_qsl(partes.query, keep_blank_values=True)
+                        if not clave.lower().startswith('utm_') and clave.lower() not in PARAMETROS_SEGUIMIENTO)
+    return urlunparse((esquema, host, ruta, '', urlencode(parametros), ''))
+
+
+def clave_url(url):
+    """Identidad de una URL: la forma canónica sin esquema, sin 'www.' y sin '/' final en la ruta."""
+    sin_esquema = canonizar_url(url).split('://', 1)[-1]
+    if sin_esquema.startswith('www.'):
+        sin_esquema = sin_esquema[len('www.'):]
+    ruta, _, consulta = sin_esquema.partition('?')
+    return ruta.rstrip('/') + ('?' + consulta if consulta else '')
+
+
+class IndiceURLs:
+    """
+    Conjunto de URLs ya procesadas, comparadas por su clave canónica (`clave_url`).
+
+    Incluye las fuentes de los eventos guardados y los artículos que ya se analizaron aunque
+    no fueran relevantes. Estos últimos se persisten como un archivo de texto ordenado
+    (`clave<TAB>fecha` por línea) y se olvidan después de `dias_retencion` días, porque las
+    portadas dejan de enlazarlos. Las URLs tomadas en la corrida actual cuentan como
+    procesadas pero sólo se persisten si su análisis terminó.
+    """
+
+    def __init__(self, ruta=None, dias_retencion=30, urls_permanentes=()):
+        self.ruta = ruta
+        self.dias_retencion = dias_retencion
+        self._permanentes = {clave_url(url) for url in urls_permanentes}
+        self._analizadas = {}
+        self._en_curso = set()
+        self._modificado = False
+        self._lock = threading.Lock()
+        if ruta:
+            self._cargar()
+
+    def _cargar(self):
+        try:
+            with open(self.ruta, 'r', encoding='utf-8') as f:
+                for linea in f:
+                    clave, _, fecha = linea.rstrip('\n').partition('\t')
+                    if clave:
+                        self._analizadas[clave] = fecha
+        except FileNotFoundError:
+            pass
+
+    def __contains__(self, url):
+        clave = clave_url(url)
+        return clave in self._permanentes or clave in self._analizadas or clave in self._en_curso
+
+    def __len__(self):
+        return len(self._permanentes | self._analizadas.keys())
+
+    def add(self, url):
+        """Agrega una URL permanente (fuente de un evento guardado)."""
+        with self._lock:
+            self._permanentes.add(clave_url(url))
+
+    def reclamar(self, url):
+        """Toma la URL para analizarla en esta corrida. Devuelve False si ya estaba procesada o tomada."""
+        clave = clave_url(url)
+        with self._lock:
+            if clave in self._permanentes or clave in self._analizadas or clave in self._en_curso:
+                return False
+            self._en_curso.add(clave)
+            return True
+
+    def marcar_analizada(self, url, fecha):
+        with self._lock:
+            self._analizadas[clave_url(url)] = fecha
+            self._modificado = True
+
+    def liberar_en_curso(self):
+        """
+        Suelta las URLs tomadas cuyo análisis no terminó (falló la descarga o la IA), para que
+        se vuelvan a intentar. El modo demonio lo hace al final de cada ciclo.
+        """
+        with self._lock:
+            self._en_curso.clear()
+
+    def persistir(self, fecha_actual):
+        if not self.ruta:
+            return
+        with self._lock:
+            limite = (fecha_actual - timedelta(days=self.dias_retencion)).strftime("%Y-%m-%d")
+            vigentes = {clave: fecha for clave, fecha in self._analizadas.items() if fecha >= limite}
+            if not self._modificado and len(vigentes) == len(self._analizadas):
+                return
+            self._analizadas = vigentes
+            try:
+                _escribir_atomico(self.ruta, "".join(f"{clave}\t{fecha}\n" for clave, fecha in sorted(vigentes.items())))
+                self._modificado = False
+            except OSError as e:
+                print(f"[!] No se pudo guardar el índice de URLs {self.ruta}: {e}")
+
+
+def extraer_texto_articulo(contenido, xpath_cuerpo=None):
+    """
+    Extrae el texto de los párrafos del cuerpo de un artículo. Deja de leer párrafos en
+    cuanto junta LARGO_MAXIMO_TEXTO caracteres, que es todo lo que se envía a la IA.
+    """
+    try:
+        documento = lxml_html.fromstring(contenido)
+    except (etree.ParserError, ValueError):
+        return None
+
+    # Intenta encontrar el contenido principal del artículo (se puede ajustar por sitio en SELECTORES_POR_SITIO)
+    cuerpo_articulo = documento  # Fallback si no encuentra una estructura clara
+    for xpath in ((xpath_cuerpo,) if xpath_cuerpo else ()) + XPATH_CUERPO_POR_DEFECTO:
+        encontrados = documento.xpath(xpath)
+        if encontrados:
+            cuerpo_articulo = encontrados[0]
+            break
+
+    parrafos = []
+    largo = 0
+    for parrafo in cuerpo_articulo.iter('p'):
+        texto = parrafo.text_content()
+        parrafos.append(texto)
+        largo += len(" ".join(texto.split())) + 1
+        if largo >= LARGO_MAXIMO_TEXTO:
+            break
+    return ' '.join(parrafos)
+
+
+def extraer_enlaces(contenido, url_base, selectores=None):
+    """
+    Devuelve los pares (titular, URL absoluta) de una portada HTML o de un feed RSS.
+    Sólo se recorren los elementos <a> (o los <item> del feed).
+    """
+    selectores = selectores or {}
+    if selectores.get('rss'):
+        try:
+            raiz = etree.fromstring(contenido, parser=etree.XMLParser(recover=True))
+        except etree.XMLSyntaxError:
+            return []
+        if raiz is None:
+            return []
+        return [(item.findtext('title') or '', (item.findtext('link') or '').strip()) for item in raiz.iter('item')]
+
+    try:
+        documento = lxml_html.fromstring(contenido)
+    except (etree.ParserError, ValueError):
+        return []
+    if selectores.get('enlaces'):
+        links = documento.xpath(selectores['enlaces'])
+    else:
+        links = documento.iter('a')
+    enlaces = []
+    for link in links:
+        if not link.get('href'):
+            continue
+        try:
+            enlaces.append((link.text_content(), urljoin(url_base, link.get('href'))))
+        except ValueError:
+            # href malformado (http://[malformed/): se saltea el enlace y no el sitio entero
+            continue
+    return enlaces
+
+
+def obtener_texto_articulo(url, xpath_cuerpo=None):
+    """
+    Obtiene el texto plano de un artículo dado su URL.
+    """
+    try:
+        response = descargar(url, timeout=10)
+        if response.status_code == 200:
+            return extraer_texto_articulo(response.content, xpath_cuerpo)
+        return None
+    except requests.RequestException as e:
+        avisar(f"  [!] Error al obtener el artículo {url}: {e}")
+        return None
+
+
+def seleccionar_enlaces(contenido, nombre_sitio, url_base, urls_procesadas):
+    """
+    Devuelve las URLs de la portada (con las redirecciones resueltas) cuyo titular contiene
+    alguna palabra clave y que no fueron procesadas, de mayor a menor puntaje_titular. Si
+    una nota está enlazada de varias maneras, se toma el primer enlace.
+    """
+    puntajes = {}
+    claves = set()
+    for titulo, url_articulo in extraer_enlaces(contenido, url_base, SELECTORES_POR_SITIO.get(nombre_sitio)):
+        titulo = titulo.strip().lower()
+        if contiene_keyword(titulo):
+            url_articulo = resolver_redireccion(url_articulo)
+            clave = clave_url(url_articulo)
+
+            # La lógica clave: ignorar si ya fue procesada
+            if clave not in claves and url_articulo not in urls_procesadas:
+                claves.add(clave)
+                puntajes[url_articulo] = puntaje_titular(titulo)
+    # Los titulares que anuncian algo futuro se analizan primero (el orden es estable)
+    return sorted(puntajes, key=puntajes.get, reverse=True)
+
+
+def _enlaces_relevantes(nombre_sitio, url_base, urls_procesadas):
+    """
+    Devuelve los enlaces de la portada cuyo titular contiene alguna palabra clave y que no
+    fueron procesados, o None si no se pudo acceder al sitio.
+
+    La portada se pide con If-None-Match/If-Modified-Since. Si el servidor responde 304, o
+    el contenido tiene el mismo hash que la última vez, no se vuelve a analizar: se retoman
+    los enlaces relevantes de la corrida anterior que todavía no se analizaron, tanto los que
+    superaron el tope por sitio como los que no se pudieron descargar o analizar.
+    """
+    entrada = cache_paginas.obtener(url_base)
+    headers = {}
+    if entrada:
+        if entrada.get('etag'):
+            headers['If-None-Match'] = entrada['etag']
+        if entrada.get('last_modified'):
+            headers['If-Modified-Since'] = entrada['last_modified']
+
+    inicio = time.monotonic()
+    response = descargar(url_base, timeout=15, headers=headers)
+    segundos_descarga = time.monotonic() - inicio
+
+    if response.status_code == 304 and entrada:
+        ahorro_por_sitio[nombre_sitio] = {
+            'bytes': entrada['bytes'],
+            'segundos': max(0.0, entrada['segundos_descarga'] + entrada['segundos_analisis'] - segundos_descarga),
+        }
+        avisar("  [=] Portada sin cambios (304).")
+        urls_a_analizar = [url for url in entrada['pendientes'] if url not in urls_procesadas]
+        # Se guarda siempre, aunque no cambien los pendientes, para renovar la antigüedad de la
+        # entrada: si no, al vencer TTL_CACHE_PAGINAS se volvería a bajar una portada sin cambios
+        cache_paginas.guardar(url_base, dict(entrada, pendientes=urls_a_analizar))
+        return urls_a_analizar
+
+    if response.status_code != 200:
+        avisar(f"  [!] No se pudo acceder a {nombre_sitio} (código: {response.status_code}).")
+        return None
+
+    hash_contenido = hashlib.sha256(response.content).hexdigest()
+    if entrada and entrada['hash'] == hash_contenido:
+        ahorro_por_sitio[nombre_sitio] = {'bytes': 0, 'segundos': entrada['segundos_analisis']}
+        avisar("  [=] Portada sin cambios (mismo contenido).")
+        urls_a_analizar = [url for url in entrada['pendientes'] if url not in urls_procesadas]
+        segundos_analisis = entrada['segundos_analisis']
+    else:
+        inicio = time.monotonic()
+        urls_a_analizar = seleccionar_enlaces(response.content, nombre_sitio, url_base, urls_procesadas)
+        segundos_analisis = time.monotonic() - inicio
+
+    cache_paginas.guardar(url_base, {
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+        'hash': hash_contenido,
+        'bytes': len(response.content),
+        'segundos_descarga': segundos_descarga,
+        'segundos_analisis': segundos_analisis,
+        # Todos los enlaces sin analizar: los que se analizan en esta corrida se descartan la
+        # próxima al filtrarlos con urls_procesadas, y los que fallen se vuelven a intentar
+        'pendientes': urls_a_analizar,
+    })
+    return urls_a_analizar
+
+
+def imprimir_ahorro_cache_paginas():
+    """Resume lo que se ahorró en esta corrida por no volver a bajar o analizar portadas sin cambios."""
+    if not ahorro_por_sitio:
+        return
+    for nombre_sitio, ahorro in sorted(ahorro_por_sitio.items()):
+        print(f"  - {nombre_sitio}: {ahorro['bytes'] / 1024:.0f} KB y {ahorro['segundos']:.2f} s ahorrados")
+    total_bytes = sum(ahorro['bytes'] for ahorro in ahorro_por_sitio.values())
+    total_segundos = sum(ahorro['segundos'] for ahorro in ahorro_por_sitio.values())
+    print(f"[🗃️] Portadas sin cambios: {len(ahorro_por_sitio)} de {len(SITIOS_A_MONITOREAR)} "
+          f"({total_bytes / 1024:.0f} KB y {total_segundos:.2f} s ahorrados).")
+
+
+def descubrir_articulos(nombre_sitio, url_base, urls_procesadas):
+    """
+    Busca en la portada de un sitio artículos nuevos que parezcan relevantes y descarga su texto.
+    Devuelve una lista de candidatos `{'sitio', 'url', 'texto'}`. Los mensajes del sitio se
+    imprimen juntos cuando termina (ver avisos_agrupados).
+    """
+    candidatos = []
+
+    with avisos_agrupados(), metricas.sitio(nombre_sitio):
+        avisar(f"[*] Monitoreando {nombre_sitio}...")
+        try:
+            urls_a_analizar = _enlaces_relevantes(nombre_sitio, url_base, urls_procesadas)
+            if urls_a_analizar is None:
+                metricas.contar('sitios_inaccesibles')
+                return []
+
+            avisar(f"  [-] {len(urls_a_analizar)} artículos nuevos potencialmente relevantes encontrados.")
+
+            # Limitar la cantidad de nuevos artículos a analizar para no exceder cuotas/costos
+            for url in urls_a_analizar[:MAX_ARTICULOS_POR_SITIO]:
+                # Marcar como procesada para no volver a intentarlo en esta misma ejecución
+                # (ni desde otro sitio que se esté rastreando en paralelo)
+                if not urls_procesadas.reclamar(url):
+                    continue
+                avisar(f"  -> Descargando: {url}")
+                texto = obtener_texto_articulo(url, SELECTORES_POR_SITIO.get(nombre_sitio, {}).get('cuerpo'))
+                if texto:
+                    candidatos.append({'sitio': nombre_sitio, 'url': url, 'texto': texto})
+
+        except Exception as e:
+            metricas.contar('sitios_con_error')
+            avisar(f"  [!] Error monitoreando {nombre_sitio}: {e}")
+
+    metricas.contar('articulos_descargados', len(candidatos))
+    return candidatos
+
+
+def extraer_eventos(candidatos, fecha_referencia, urls_procesadas=None):
+    """
+    Analiza con la IA los artículos candidatos y devuelve los eventos relevantes, en el mismo orden.
+    Los artículos cuyo análisis terminó se marcan en `urls_procesadas` para no repetirlos.
+    """
+    fecha_analisis = fecha_referencia.strftime("%Y-%m-%d")
+    if PREFILTRO_ACTIVO:
+        descartados = [candidato for candidato in candidatos if not pasa_prefiltro(candidato['texto'])]
+        if descartados:
+            print(f"  [-] Prefiltro: {len(descartados)} de {len(candidatos)} artículos sin referencias a una fecha futura, no se envían a la IA.")
+            metricas.contar('descartados_prefiltro', len(descartados))
+            if urls_procesadas is not None:
+                for candidato in descartados:
+                    urls_procesadas.marcar_analizada(candidato['url'], fecha_analisis)
+            candidatos = [candidato for candidato in candidatos if candidato not in descartados]
+
+    resultados = analizar_noticias_con_ia([candidato['texto'] for candidato in candidatos], fecha_referencia)
+    eventos_encontrados = []
+    for candidato, info_evento in zip(candidatos, resultados):
+        if info_evento is None:
+            continue
+        if urls_procesadas is not None:
+            urls_procesadas.marcar_analizada(candidato['url'], fecha_analisis)
+        if info_evento.get("es_evento_relevante"):
+            info_evento['fuente'] = candidato['url']
+            if info_evento.get('quien', 'No especificado') == 'No especificado':
+                info_evento['quien'] = candidato['sitio']
+            eventos_encontrados.append(Evento(info_evento))
+            print(f"    [+] Evento relevante detectado: {candidato['url']}")
+    metricas.contar('articulos_analizados', len(candidatos))
+    metricas.contar('eventos_detectados', len(eventos_encontrados))
+    return eventos_encontrados
+
+
+def monitorear_sitio(nombre_sitio, url_base, fecha_referencia, urls_procesadas):
+    """
+    Busca noticias relevantes en un sitio, evitando URLs ya procesadas.
+    """
+    return extraer_eventos(descubrir_articulos(nombre_sitio, url_base, urls_procesadas), fecha_referencia, urls_procesadas)
+
+
+def monitorear_sitios(sitios, fecha_referencia, urls_procesadas, textos_por_url=None, novedades_por_sitio=None):
+    """
+    Rastrea todos los sitios en paralelo y después analiza todos los artículos encontrados
+    en una sola tanda de llamadas a la IA. Los eventos se devuelven en el orden de `sitios`.
+    Si se pasa `textos_por_url`, se guarda ahí el texto de cada artículo descargado
+    (indexado por clave_url) para reutilizarlo al completar datos faltantes. Si se pasa
+    `novedades_por_sitio`, se guarda ahí cuántos artículos nuevos y eventos dio cada sitio.
+    """
+    with metricas.etapa('rastreo'):
+        if MAX_CONEXIONES_GLOBALES == 1:
+            candidatos = []
+            for nombre, url in sitios.items():
+                candidatos.extend(descubrir_articulos(nombre, url, urls_procesadas))
+        else:
+            with ThreadPoolExecutor(max_workers=MAX_CONEXIONES_GLOBALES) as pool:
+                futuros = [pool.submit(descubrir_articulos, nombre, url, urls_procesadas)
+                           for nombre, url in sitios.items()]
+                candidatos = []
+                for futuro in futuros:
+                    candidatos.extend(futuro.result())
+
+    if textos_por_url is not None:
+        textos_por_url.update((clave_url(candidato['url']), candidato['texto']) for candidato in candidatos)
+
+    print(f"[*] Analizando {len(candidatos)} artículos con la IA...")
+    with metricas.etapa('analisis_ia'):
+        eventos = extraer_eventos(candidatos, fecha_referencia, urls_procesadas)
+
+    if novedades_por_sitio is not None:
+        for nombre in sitios:
+            novedades_por_sitio[nombre] = {'articulos': 0, 'eventos': 0}
+        sitio_por_url = {}
+        for candidato in candidatos:
+            novedades_por_sitio[candidato['sitio']]['articulos'] += 1
+            sitio_por_url[candidato['url']] = candidato['sitio']
+        for evento in eventos:
+            novedades_por_sitio[sitio_por_url[evento.fuentes[0]]]['eventos'] += 1
+    return eventos
+
+
+def imprimir_tabla_eventos(eventos):
+    """
+    Imprime una lista de eventos en un formato de tabla bien alineado.
+    """
+    if not eventos:
+        print("✅ No se encontraron eventos programados para hoy en los sitios monitoreados.")
+        return
+
+    # Definir cabeceras y claves de datos
+    cabeceras = {
+        "fecha": "FECHA",
+        "horario": "HORA",
+        "tipo_medida": "QUÉ",
+        "lugar": "LUGAR",
+        "quien": "QUIÉN",
+        "motivo": "MOTIVO"
+    }
+    claves = list(cabeceras.keys())
+
+    # Definir anchos máximos para columnas que pueden ser muy largas
+    max_anchos = {
+        "motivo": 50,
+        "lugar": 40,
+        "quien": 30
+    }
+
+    # Calcular el ancho para cada columna
+    anchos = {k: len(v) for k, v in cabeceras.items()}
+    for evento in eventos:
+        for clave in claves:
+            contenido = str(evento.get(clave, '-'))
+            ancho_contenido = len(contenido)
+            if clave in max_anchos and ancho_contenido > max_anchos[clave]:
+                ancho_contenido = max_anchos[clave]
+            if ancho_contenido > anchos[clave]:
+                anchos[clave] = ancho_contenido
+
+    # Función para truncar texto
+    def truncar(texto, ancho):
+        if len(texto) > ancho:
+            return texto[:ancho-3] + "..."
+        return texto
+
+    # Imprimir cabecera de la tabla
+    linea_cabecera = " | ".join([cabeceras[k].ljust(anchos[k]) for k in claves])
+    print(linea_cabecera)
+    print("-" * len(linea_cabecera))
+
+    # Imprimir filas de datos
+    for evento in eventos:
+        fila = []
+        for clave in claves:
+            contenido = str(evento.get(clave, '-'))
+            ancho_columna = anchos[clave]
+            if clave in max_anchos:
+                contenido_truncado = truncar(contenido, ancho_columna)
+                fila.append(contenido_truncado.ljust(ancho_columna))
+            else:
+                fila.append(contenido.ljust(ancho_columna))
+        print(" | ".join(fila))
+
+# Umbrales de similitud (token_sort_ratio) para considerar dos eventos de la misma fecha como uno solo.
+UMBRALES_CONSOLIDACION = (('lugar', 80), ('quien', 80), ('motivo', 85))
+
+
+@functools.lru_cache(maxsize=1 << 16)
+def _clave_fuzzy(valor):
+    """
+    Normaliza un texto igual que fuzz.token_sort_ratio (ASCII, minúsculas, tokens ordenados),
+    para poder calcular la similitud una sola vez por evento en lugar de en cada comparación.
+    """
+    if valor is None:
+        return None
+    return " ".join(sorted(fuzz_utils.full_process(valor, force_ascii=True).split()))
+
+
+def _supera_umbral(clave_a, clave_b, umbral):
+    """Equivale a `fuzz.token_sort_ratio(a, b) > umbral` sobre claves ya normalizadas."""
+    if clave_a is None or clave_b is None:
+        return False
+    total = len(clave_a) + len(clave_b)
+    # Cota superior del ratio (2 * longitud menor / suma): si no alcanza el umbral se descarta sin calcularlo.
+    if total and 200 * min(len(clave_a), len(clave_b)) / total <= umbral:
+        return False
+    return fuzz.ratio(clave_a, clave_b) > umbral
+
+
+# --- Eventos ---
+
+CAMPOS_EVENTO = ('es_evento_relevante', 'fecha', 'horario', 'lugar', 'quien', 'tipo_medida', 'motivo', 'fuente')
+# Campos con atributo propio; `fuente` se guarda como la tupla `fuentes`.
+_CAMPOS_ATRIBUTO = frozenset(CAMPOS_EVENTO[:-1])
+# Textos con pocos valores distintos, que se internan para compartir una sola copia.
+_CAMPOS_INTERNADOS = frozenset(('fecha', 'horario', 'lugar', 'quien', 'tipo_medida'))
+_CAMPOS_FUZZY = frozenset(campo for campo, _ in UMBRALES_CONSOLIDACION)
+_PATRON_HORA = re.compile(r'(?<!\d)([01]?\d|2[0-3])[:.]([0-5]\d)(?!\d)')
+
+
+def _internar(valor):
+    return sys.intern(valor) if isinstance(valor, str) else valor
+
+
+@functools.lru_cache(maxsize=4096)
+def _parsear_minutos(horario):
+    """Minutos desde la medianoche de la primera hora del horario ("**11:00**", "16:00-20:00"), o None."""
+    if not isinstance(horario, str):
+        return None
+    match = _PATRON_HORA.search(horario)
+    return int(match.group(1)) * 60 + int(match.group(2)) if match else None
+
+
+@functools.lru_cache(maxsize=4096)
+def _parsear_dia(fecha):
+    """La fecha como `date`, o None si no es una fecha completa ("2025-02-XX", "No especificado")."""
+    if not isinstance(fecha, str) or not _PATRON_FECHA.fullmatch(fecha):
+        return None
+    try:
+        return date.fromisoformat(fecha)
+    except ValueError:
+        return None
+
+
+def _campo_evento(nombre):
+    """Propiedad de un campo del JSON: al asignarlo lo interna y actualiza los datos derivados."""
+    privado = '_' + nombre
+    internar = nombre in _CAMPOS_INTERNADOS
+    fuzzy = nombre in _CAMPOS_FUZZY
+
+    def asignar(self, valor):
+        if internar and isinstance(valor, str):
+            valor = sys.intern(valor)
+        setattr(self, privado, valor)
+        self._registrar(nombre)
+        if nombre == 'fecha':
+            self.dia = _parsear_dia(valor)
+        elif nombre == 'horario':
+            self.minutos = _parsear_minutos(valor)
+        if fuzzy:
+            self._claves = None
+
+    return property(operator.attrgetter(privado), asignar)
+
+
+class Evento:
+    """
+    Un evento de protesta. Los campos del JSON son atributos, salvo `fuente`, que se guarda
+    como la tupla `fuentes` (en el JSON es un texto con las URLs separadas por ", ").
+    Además tiene la fecha como `date` (`dia`) y la hora de inicio en minutos (`minutos`),
+    None si no se pueden interpretar, y las claves de similitud de UMBRALES_CONSOLIDACION,
+    que se calculan una sola vez y se descartan cuando cambia alguno de esos campos.
+
+    `Evento(dict)` y `a_dict()` convierten desde y hacia el JSON sin perder nada (campos
+    extra o ausentes y su orden). También se puede usar como el diccionario que reemplaza:
+    `evento.get('lugar')`, `evento['horario'] = ...`.
+    """
+
+    __slots__ = ('_es_evento_relevante', '_fecha', '_horario', '_lugar', '_quien', '_tipo_medida', '_motivo',
+                 '_fuentes', 'dia', 'minutos', '_fuente_como', '_claves', '_extras', '_orden')
+
+    es_evento_relevante = _campo_evento('es_evento_relevante')
+    fecha = _campo_evento('fecha')
+    horario = _campo_evento('horario')
+    lugar = _campo_evento('lugar')
+    quien = _campo_evento('quien')
+    tipo_medida = _campo_evento('tipo_medida')
+    motivo = _campo_evento('motivo')
+
+    def __init__(self, datos=None):
+        self._fuente_como = 'texto'
+        self._claves = None
+        self._extras = None
+        datos = datos or {}
+        if tuple(datos) == CAMPOS_EVENTO and isinstance(datos['fuente'], str):
+            # Caso habitual (lo que se lee del almacenamiento): sin campos extra ni ausentes
+            self._orden = None
+            self._es_evento_relevante = datos['es_evento_relevante']
+            self._fecha = fecha = _internar(datos['fecha'])
+            self._horario = horario = _internar(datos['horario'])
+            self._lugar = _internar(datos['lugar'])
+            self._quien = _internar(datos['quien'])
+            self._tipo_medida = _internar(datos['tipo_medida'])
+            self._motivo = datos['motivo']
+            self._fuentes = tuple(datos['fuente'].split(", "))
+            self.dia = _parsear_dia(fecha)
+            self.minutos = _parsear_minutos(horario)
+            return
+        self._es_evento_relevante = self._fecha = self._horario = self._lugar = None
+        self._quien = self._tipo_medida = self._motivo = None
+        self._fuentes = ()
+        self.dia = self.minutos = None
+        # Campos presentes, en orden; None es el caso habitual: exactamente CAMPOS_EVENTO
+        self._orden = []
+        for clave, valor in datos.items():
+            self[clave] = valor
+        if tuple(self._orden) == CAMPOS_EVENTO:
+            self._orden = None
+
+    @classmethod
+    def desde(cls, evento):
+        return evento if isinstance(evento, cls) else cls(evento)
+
+    @property
+    def fuentes(self):
+        return self._fuentes
+
+    @fuentes.setter
+    def fuentes(self, fuentes):
+        self._fuentes = tuple(fuentes)
+        self._registrar('fuente')
+
+    def _registrar(self, clave):
+        if self._orden is None:
+            if clave not in CAMPOS_EVENTO:
+                self._orden = list(CAMPOS_EVENTO) + [clave]
+        elif clave not in self._orden:
+            self._orden.append(clave)
+
+    def _presentes(self):
+        return CAMPOS_EVENTO if self._orden is None else self._orden
+
+    def __contains__(self, clave):
+        return clave in self._presentes()
+
+    def __getitem__(self, clave):
+        if clave not in self._presentes():
+            raise KeyError(clave)
+        if clave == 'fuente':
+            if self._fuente_como == 'texto':
+                return ", ".join(self._fuentes)
+            return list(self._fuentes) if self._fuente_como == 'lista' else None
+        if clave in _CAMPOS_ATRIBUTO:
+            return getattr(self, clave)
+        return self._extras[clave]
+
+    def __setitem__(self, clave, valor):
+        if clave == 'fuente':
+            if isinstance(valor, list):
+                self._fuente_como, self.fuentes = 'lista', valor
+            elif valor is None:
+                self._fuente_como, self.fuentes = None, ()
+            else:
+                self._fuente_como, self.fuentes = 'texto', str(valor).split(", ")
+        elif clave in _CAMPOS_ATRIBUTO:
+            setattr(self, clave, valor)
+        else:
+            if self._extras is None:
+                self._extras = {}
+            self._extras[clave] = valor
+            self._registrar(clave)
+
+    def get(self, clave, por_defecto=None):
+        return self[clave] if clave in self._presentes() else por_defecto
+
+    def keys(self):
+        return list(self._presentes())
+
+    def a_dict(self):
+        """El evento en el formato del JSON, con los campos en su orden original."""
+        return {clave: self[clave] for clave in self._presentes()}
+
+    def __eq__(self, otro):
+        if isinstance(otro, (Evento, dict)):
+            return self.a_dict() == (otro.a_dict() if isinstance(otro, Evento) else otro)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Evento({self.a_dict()!r})"
+
+    def __reduce__(self):
+        # copy.deepcopy y pickle pasan por el formato del JSON
+        return (Evento, (self.a_dict(),))
+
+    def clave_orden(self):
+        """Para ordenar por fecha y hora de inicio; sin fecha o sin hora reconocible, al final."""
+        return (self._fecha if isinstance(self._fecha, str) else '9999-12-31',
+                1440 if self.minutos is None else self.minutos,
+                self._horario if isinstance(self._horario, str) else '')
+
+    def claves_fuzzy(self):
+        if self._claves is None:
+            self._claves = tuple(_clave_fuzzy(self.get(campo, '')) for campo, _ in UMBRALES_CONSOLIDACION)
+        return self._claves
+
+    def agregar_fuentes(self, fuentes):
+        self.fuentes = self._fuentes + tuple(url for url in dict.fromkeys(fuentes) if url not in self._fuentes)
+
+
+class IndiceConsolidacion:
+    """
+    Índice de eventos consolidados agrupados por fecha.
+
+    Dos eventos sólo pueden fusionarse si tienen la misma fecha, así que cada evento
+    nuevo se compara únicamente contra los de su misma fecha, en el orden en que fueron
+    agregados. Las claves de similitud de cada evento se calculan la primera vez que
+    su fecha es consultada y quedan guardadas en el evento.
+    """
+
+    def __init__(self, eventos=()):
+        self.eventos = []
+        self._por_fecha = {}
+        for evento in eventos:
+            self.agregar(evento)
+
+    def buscar(self, evento):
+        """Devuelve la posición del primer evento equivalente, o None."""
+        claves = evento.claves_fuzzy()
+        for posicion in self._por_fecha.get(evento.fecha, ()):
+            claves_existente = self.eventos[posicion].claves_fuzzy()
+            for (_, umbral), clave_nueva, clave_existente in zip(UMBRALES_CONSOLIDACION, claves, claves_existente):
+                if _supera_umbral(clave_nueva, clave_existente, umbral):
+                    return posicion
+        return None
+
+    def agregar(self, evento):
+        evento = Evento.desde(evento)
+        self._por_fecha.setdefault(evento.fecha, []).append(len(self.eventos))
+        self.eventos.append(evento)
+
+    def fusionar(self, posicion, evento_nuevo):
+        """Completa el evento existente con los datos y las fuentes del nuevo."""
+        evento_existente = self.eventos[posicion]
+        for clave in ['horario', 'lugar', 'quien', 'motivo']:
+            if evento_existente.get(clave) == 'No especificado' and evento_nuevo.get(clave) != 'No especificado':
+                evento_existente[clave] = evento_nuevo.get(clave)
+        evento_existente.agregar_fuentes(evento_nuevo.fuentes)
+
+    def incorporar(self, evento_nuevo):
+        """
+        Fusiona el evento con su equivalente o lo agrega como uno nuevo.
+        Devuelve la posición del evento resultante.
+        """
+        # Considerar el mismo evento si la fecha es la misma y hay una alta similitud en lugar, quien o motivo
+        evento_nuevo = Evento.desde(evento_nuevo)
+        posicion = self.buscar(evento_nuevo)
+        if posicion is None:
+            self.agregar(evento_nuevo)
+            return len(self.eventos) - 1
+        self.fusionar(posicion, evento_nuevo)
+        return posicion
+
+
+def _unir_fuentes(eventos):
+    """Las fuentes de los eventos consolidados se escriben en el JSON como un solo texto."""
+    for evento in eventos:
+        if isinstance(evento, Evento):
+            evento['fuente'] = ", ".join(url for url in evento.fuentes if url)
+        elif isinstance(evento.get('fuente'), list):
+            evento['fuente'] = ", ".join(evento['fuente'])
+
+
+def consolidar_eventos(eventos):
+    """
+    Consolida eventos duplicados de diferentes fuentes, 
+    combinando la información para completarla usando fuzzy string matching.
+    """
+    indice = IndiceConsolidacion()
+    for evento_nuevo in eventos:
+        indice.incorporar(evento_nuevo)
+
+    _unir_fuentes(indice.eventos)
+    return indice.eventos
+
+
+def _consolidar_particiones(particiones):
+    """
+    Consolida varias particiones, cada una con los eventos `(posición, evento)` de una misma
+    fecha en el orden original. Devuelve `(posición del primer evento del grupo, evento
+    consolidado)` por cada grupo. Se ejecuta en los procesos de consolidar_eventos_en_paralelo.
+    """
+    resultado = []
+    for particion in particiones:
+        indice = IndiceConsolidacion()
+        primeros = []
+        for posicion, evento in particion:
+            if indice.incorporar(evento) == len(primeros):
+                primeros.append(posicion)
+        _unir_fuentes(indice.eventos)
+        resultado.extend(zip(primeros, indice.eventos))
+    return resultado
+
+
+def _consolidar_por_fecha(eventos, procesos=None):
+    """
+    Consolida los eventos repartiendo las fechas entre `procesos` procesos. Devuelve pares
+    `(posición del primer evento del grupo, evento consolidado)` ordenados por posición.
+    """
+    procesos = procesos or PROCESOS_CONSOLIDACION
+    particiones = {}
+    for posicion, evento in enumerate(eventos):
+        particiones.setdefault(evento.get('fecha'), []).append((posicion, evento))
+
+    if procesos <= 1 or len(eventos) < MIN_EVENTOS_EN_PARALELO:
+        resultado = _consolidar_particiones(particiones.values())
+    else:
+        # Varias tareas por proceso, cada partición (de la más grande a la más chica) en la menos cargada
+        tareas = [(0, numero, []) for numero in range(procesos * 4)]
+        for particion in sorted(particiones.values(), key=len, reverse=True):
+            carga, numero, tarea = heapq.heappop(tareas)
+            tarea.append(particion)
+            heapq.heappush(tareas, (carga + len(particion), numero, tarea))
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            resultado = [par for parte in pool.map(_consolidar_particiones, [tarea for _, _, tarea in tareas if tarea])
+                         for par in parte]
+    resultado.sort(key=lambda par: par[0])
+    return resultado
+
+
+def consolidar_eventos_en_paralelo(eventos, procesos=None):
+    """
+    Igual que consolidar_eventos (el mismo resultado y en el mismo orden), pero repartiendo
+    las fechas entre varios procesos: dos eventos sólo se fusionan si tienen la misma fecha,
+    así que cada fecha se consolida por separado y los grupos se ordenan por la posición de
+    su primer evento. Para backfills grandes; con pocos eventos o un solo proceso, en serie.
+    """
+    return [evento for _, evento in _consolidar_por_fecha(eventos, procesos)]
+
+
+def consolidar_incremental(indice, eventos_nuevos):
+    """
+    Incorpora eventos nuevos a un índice cuyo historial ya está consolidado.
+
+    El historial se considera fijo: sus eventos no se vuelven a comparar entre sí y
+    sólo se tocan los que absorben un evento nuevo. Devuelve la lista de eventos
+    creados o modificados en esta corrida.
+    """
+    posiciones_afectadas = dict.fromkeys(indice.incorporar(evento_nuevo) for evento_nuevo in eventos_nuevos)
+    eventos_afectados = [indice.eventos[posicion] for posicion in posiciones_afectadas]
+    _unir_fuentes(eventos_afectados)
+    return eventos_afectados
+
+# Hora de inicio explícita: "a las 10", "desde las 18.30 hs", "a las 8 de la noche", "10:30 hs".
+_PATRON_HORARIO = re.compile(
+    r'\b(?:a|desde) las? (\d{1,2})(?:[:.](\d{2}))?(?![\d.,]?\d)(?: ?(?:hs?\b\.?|horas\b))?(?: de la (tarde|noche))?'
+    r'|\b(\d{1,2}):(\d{2}) ?(?:hs?|horas)\b',
+    re.IGNORECASE)
+
+
+def buscar_horario_en_texto(texto):
+    """
+    Devuelve la hora de inicio explícita del texto en formato HH:MM, o None si no hay
+    ninguna o si hay varias distintas: un artículo puede mencionar otros eventos (la
+    marcha de la semana pasada, un acto posterior), y en ese caso decide la IA.
+    """
+    horarios = set()
+    for match in _PATRON_HORARIO.finditer(texto):
+        if match.group(1):
+            hora, minutos = int(match.group(1)), int(match.group(2) or 0)
+            if match.group(3) and hora < 12:
+                hora += 12
+        else:
+            hora, minutos = int(match.group(4)), int(match.group(5))
+        if hora < 24 and minutos < 60:
+            horarios.add(f"{hora:02d}:{minutos:02d}")
+            if len(horarios) > 1:
+                return None
+    return horarios.pop() if horarios else None
+
+
+def _consulta_horario(evento):
+    # Construir una consulta de búsqueda más natural y detallada
+    motivo_corto = ' '.join(evento.get('motivo', '').split()[:5]) # Usar las primeras 5 palabras del motivo
+    return f"a qué hora es la protesta de {evento.get('quien', '')} en {evento.get('lugar', '')} el {evento.get('fecha', '')} por {motivo_corto}"
+
+
+def _buscar_horario(consulta, textos_por_url, limite):
+    """
+    Busca la consulta en la web y revisa hasta 3 resultados, primero con _PATRON_HORARIO y,
+    si ninguno trae una única hora explícita, con la IA. No se empieza nada después de `limite`.
+
+    Corre en otro hilo y no modifica nada compartido (`textos_por_url` sólo se lee), porque
+    puede seguir en curso cuando se agota el presupuesto. Devuelve (encontrado, textos
+    descargados {clave_url: texto}, respuestas nuevas de la IA {clave de cache_ia: horario}),
+    donde `encontrado` es (horario, url) o None.
+    """
+    descargados, respuestas_ia = {}, {}
+    if time.monotonic() >= limite:
+        return None, descargados, respuestas_ia
+    try:
+        with metricas.etapa('busqueda_web'), ddgs.DDGS() as buscador:
+            resultados = list(buscador.text(consulta, max_results=3))
+        metricas.contar('busquedas_web')
+
+        if not resultados:
+            print(f"    [!] No se encontraron resultados en la búsqueda web: {consulta}")
+            return None, descargados, respuestas_ia
+
+        textos = []
+        for resultado in resultados:
+            url = resultado['href']
+            clave = clave_url(url)
+            if clave in textos_por_url:
+                metricas.contar('textos_reutilizados')
+                texto = textos_por_url[clave]
+            elif time.monotonic() < limite:
+                print(f"    -> Analizando resultado de búsqueda: {url}")
+                texto = descargados[clave] = obtener_texto_articulo(url)
+            else:
+                continue
+            if not texto:
+                continue
+            horario = buscar_horario_en_texto(texto)
+            if horario:
+                metricas.contar('horarios_por_patron')
+                return (horario, url), descargados, respuestas_ia
+            textos.append((url, texto))
+
+        # Sólo si ningún resultado menciona una única hora explícita se consulta a la IA
+        for url, texto in textos:
+            if time.monotonic() >= limite:
+                break
+            horario = consultar_horario_con_ia(texto, respuestas_ia)
+            if horario != 'No especificado':
+                metricas.contar('horarios_por_ia')
+                return (horario, url), descargados, respuestas_ia
+
+    except Exception as e:
+        print(f"    [!] Error durante la búsqueda de datos faltantes: {e}")
+
+    return None, descargados, respuestas_ia
+
+
+def completar_datos_faltantes(eventos, fecha_referencia, textos_por_url=None):
+    """
+    Intenta encontrar el horario de los eventos que no lo tienen realizando búsquedas web.
+    Sólo se buscan los eventos del día de `fecha_referencia` en adelante, para no gastar
+    búsquedas ni llamadas a la IA en eventos que ya pasaron; los que no tienen una fecha
+    completa ("2025-02-XX") también se buscan, porque no se sabe si ya pasaron.
+
+    Los eventos que generarían la misma consulta comparten una sola búsqueda, y las
+    búsquedas (con sus descargas y consultas a la IA) se hacen en paralelo, hasta
+    BUSQUEDA_CONCURRENCIA a la vez y durante PRESUPUESTO_BUSQUEDA_SEGUNDOS como máximo.
+    Los artículos que ya estén en `textos_por_url` (por ejemplo, los descargados durante el
+    rastreo) no se vuelven a bajar, y los que se descargan se agregan ahí. Devuelve la
+    cantidad de eventos completados.
+    """
+    textos_por_url = {} if textos_por_url is None else textos_por_url
+    desde = fecha_referencia.date()
+    grupos = {}
+    for evento in eventos:
+        dia = evento.dia if isinstance(evento, Evento) else _parsear_dia(evento.get('fecha'))
+        if evento.get('horario', 'No especificado') == 'No especificado' and (dia is None or dia >= desde):
+            consulta = _consulta_horario(evento)
+            grupos.setdefault(" ".join(consulta.lower().split()), (consulta, []))[1].append(evento)
+    if not grupos:
+        return 0
+
+    cantidad_eventos = sum(len(eventos_grupo) for _, eventos_grupo in grupos.values())
+    print(f"[?] Buscando el horario de {cantidad_eventos} eventos con {len(grupos)} búsquedas web...")
+    metricas.contar('busquedas_evitadas', cantidad_eventos - len(grupos))
+    limite = time.monotonic() + PRESUPUESTO_BUSQUEDA_SEGUNDOS
+    pool = ThreadPoolExecutor(max_workers=BUSQUEDA_CONCURRENCIA)
+    futuros = [(pool.submit(_buscar_horario, consulta, textos_por_url, limite), eventos_grupo)
+               for consulta, eventos_grupo in grupos.values()]
+    _, sin_terminar = wait([futuro for futuro, _ in futuros], timeout=PRESUPUESTO_BUSQUEDA_SEGUNDOS)
+    # Las búsquedas en curso terminan solas (no empiezan pasos nuevos después del límite) y sus
+    # resultados se descartan: no escriben en textos_por_url ni en cache_ia
+    pool.shutdown(wait=False, cancel_futures=True)
+    if sin_terminar:
+        metricas.contar('busquedas_fuera_de_presupuesto', len(sin_terminar))
+        print(f"  [!] {len(sin_terminar)} búsquedas no terminaron dentro del presupuesto de {PRESUPUESTO_BUSQUEDA_SEGUNDOS:.0f} s.")
+
+    completados = 0
+    for futuro, eventos_grupo in futuros:
+        if futuro in sin_terminar:
+            continue
+        encontrado, descargados, respuestas_ia = futuro.result()
+        textos_por_url.update(descargados)
+        for clave, horario in respuestas_ia.items():
+            cache_ia.guardar(clave, horario)
+        if encontrado is None:
+            continue
+        horario_encontrado, url = encontrado
+        print(f"  [+] ¡Horario encontrado!: {horario_encontrado} para {len(eventos_grupo)} evento(s) en '{eventos_grupo[0].get('lugar')}'")
+        for evento in eventos_grupo:
+            evento['horario'] = horario_encontrado
+            # Opcional: añadir la nueva fuente
+            if isinstance(evento.get('fuente'), str):
+                evento['fuente'] += ", " + url
+        completados += len(eventos_grupo)
+    metricas.contar('horarios_encontrados', completados)
+    return completados
+
+
+def buscar_datos_faltantes(evento, fecha_referencia):
+    """
+    Intenta encontrar datos faltantes (como el horario) para un evento 
+    realizando una búsqueda web experimental.
+    """
+    completar_datos_faltantes([evento], fecha_referencia)
+    return evento
+
+
+
+# --- Almacenamiento de eventos ---
+
+_PATRON_FECHA = re.compile(r'\d{4}-\d{2}-\d{2}')
+_PATRON_MES = re.compile(r'\d{4}-\d{2}')
+_PATRON_PARTE_ARCHIVO = re.compile(r'(\d{4}-\d{2})(?:\.(\d+))?\.json\.gz')
+
+
+def _fecha_de(evento):
+    """Fecha con la que se agrupa un evento en el almacenamiento."""
+    fecha = evento.get('fecha')
+    return fecha if isinstance(fecha, str) else ''
+
+
+def _mes_de(fecha):
+    """Mes (YYYY-MM) en el que se archiva una fecha, o None si la fecha no indica un mes."""
+    match = _PATRON_MES.match(fecha)
+    return match.group(0) if match else None
+
+
+def _evento_a_json(evento):
+    return json.dumps(evento.a_dict() if isinstance(evento, Evento) else evento, ensure_ascii=False)
+
+
+def _serializar_dia(eventos):
+    """Un array JSON compacto con un evento por línea, para que los diffs sean legibles."""
+    return "[\n" + ",\n".join(_evento_a_json(evento) for evento in eventos) + "\n]\n"
+
+
+class AlmacenEventos:
+    """
+    Guarda los eventos en un archivo JSON por fecha (`data/dias/YYYY-MM-DD.json`) que la
+    web puede pedir directamente, más dos índices:
+
+    - `data/indice.json`: fecha de actualización; por fecha, archivo, cantidad de eventos
+      y hash del contenido; y por mes, las partes archivadas.
+    - `data/fuentes.json`: URL de cada fuente -> fechas de los días activos que la citan (una
+      misma nota puede anunciar eventos de varios días).
+
+    Cargar es un recorrido por días (se pueden pedir sólo algunas fechas) y guardar sólo
+    reescribe los días cuyo contenido cambió. Los meses viejos se mueven con `archivar` a
+    `data/archivo/YYYY-MM.json.gz`, que no se vuelven a modificar ni a cargar en cada
+    corrida, y sus fuentes a `data/archivo/fuentes.json`, para que sigan contando como
+    procesadas (`urls_fuente`). `iterar_archivo` recorre el archivo y `reconstruir_indice`
+    rehace los índices a partir de los archivos. `migrar` actualiza los índices de
+    versiones anteriores y se llama al cargar.
+    """
+
+    def __init__(self, directorio=DIRECTORIO_DATOS):
+        self.directorio = directorio
+        self._indice = None
+        self._fuentes = None
+        self._fuentes_archivadas = None
+
+    @property
+    def ruta_indice(self):
+        return os.path.join(self.directorio, 'indice.json')
+
+    @property
+    def ruta_fuentes(self):
+        return os.path.join(self.directorio, 'fuentes.json')
+
+    @property
+    def directorio_archivo(self):
+        return os.path.join(self.directorio, 'archivo')
+
+    @property
+    def ruta_fuentes_archivadas(self):
+        return os.path.join(self.directorio_archivo, 'fuentes.json')
+
+    def existe(self):
+        return os.path.exists(self.ruta_indice)
+
+    @staticmethod
+    def _leer_json(ruta, por_defecto):
+        try:
+            with open(ruta, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return por_defecto
+
+    @property
+    def indice(self):
+        if self._indice is None:
+            self._indice = self._leer_json(self.ruta_indice, {"last_updated": None, "dias": {}})
+            self._indice.setdefault('archivos', {})
+        return self._indice
+
+    @property
+    def fuentes(self):
+        if self._fuentes is None:
+            # Las versiones anteriores guardaban una sola fecha por URL (ver `migrar`)
+            self._fuentes = {url: [fechas] if isinstance(fechas, str) else fechas
+                             for url, fechas in self._leer_json(self.ruta_fuentes, {}).items()}
+        return self._fuentes
+
+    @property
+    def fuentes_archivadas(self):
+        if self._fuentes_archivadas is None:
+            self._fuentes_archivadas = self._leer_json(self.ruta_fuentes_archivadas, {})
+        return self._fuentes_archivadas
+
+    def migrar(self):
+        """
+        Actualiza los índices escritos por versiones anteriores, que guardaban una sola fecha
+        por URL en fuentes.json (y perdían las demás) y no guardaban las fuentes del archivo.
+        Devuelve True si hubo que reconstruirlos.
+        """
+        fuentes = self._leer_json(self.ruta_fuentes, {})
+        formato_viejo = any(isinstance(fechas, str) for fechas in fuentes.values())
+        sin_fuentes_archivadas = bool(self.indice['archivos']) and not os.path.exists(self.ruta_fuentes_archivadas)
+        if not (formato_viejo or sin_fuentes_archivadas):
+            return False
+        print("[*] Actualizando el formato de los índices de fuentes...")
+        self.reconstruir_indice()
+        return True
+
+    def fechas(self):
+        return sorted(self.indice['dias'])
+
+    def _archivo_de_fecha(self, fecha):
+        if _PATRON_FECHA.fullmatch(fecha):
+            return f"{fecha}.json"
+        # Fechas incompletas o inválidas ("2025-02-XX", "No especificado") en archivos aparte
+        return f"otros-{hashlib.sha1(fecha.encode('utf-8')).hexdigest()[:10]}.json"
+
+    def eventos_de(self, fecha):
+        dia = self.indice['dias'].get(fecha)
+        if dia is None:
+            return []
+        return self._leer_json(os.path.join(self.directorio, 'dias', dia['archivo']), [])
+
+    def iterar_eventos(self, fechas=None):
+        """Recorre los eventos día por día, en orden de fecha, sin cargar todo a la vez."""
+        for fecha in (self.fechas() if fechas is None else sorted(fechas)):
+            yield from self.eventos_de(fecha)
+
+    def urls_fuente(self):
+        """Las URLs citadas como fuente por algún evento, activo o archivado."""
+        return set(self.fuentes).union(self.fuentes_archivadas)
+
+    def _partes_archivadas(self, meses=None):
+        for mes, partes in sorted(self.indice['archivos'].items()):
+            if meses is None or mes in meses:
+                for parte in partes:
+                    yield os.path.join(self.directorio_archivo, parte['archivo'])
+
+    def iterar_archivo(self, meses=None):
+        """Recorre los eventos archivados, mes por mes."""
+        for ruta in self._partes_archivadas(meses):
+            with gzip.open(ruta, 'rt', encoding='utf-8') as f:
+                yield from json.load(f)
+
+    def lineas_archivadas(self):
+        """Los eventos archivados como líneas JSON, tal como están guardados (sin decodificarlos)."""
+        for ruta in self._partes_archivadas():
+            with gzip.open(ruta, 'rt', encoding='utf-8') as f:
+                for linea in f:
+                    linea = linea.rstrip('\n').rstrip(',')
+                    if linea not in ('[', ']'):
+                        yield linea
+
+    def archivar(self, fecha_limite):
+        """
+        Mueve al archivo los días de los meses anteriores al mes de `fecha_limite` (YYYY-MM-DD).
+        Cada mes se guarda como un JSON comprimido que no se vuelve a modificar: si después
+        aparecen eventos de un mes ya archivado, se archivan en una parte nueva
+        (`YYYY-MM.2.json.gz`). Las fechas que no indican un mes ("No especificado") no se
+        archivan. Devuelve {mes: eventos archivados}.
+        """
+        fechas_por_mes = {}
+        for fecha in self.fechas():
+            mes = _mes_de(fecha)
+            if mes and mes < fecha_limite[:7]:
+                fechas_por_mes.setdefault(mes, []).append(fecha)
+
+        archivados = {}
+        fuentes_archivadas = self.fuentes_archivadas
+        for mes, fechas in sorted(fechas_por_mes.items()):
+            eventos = list(self.iterar_eventos(fechas))
+            contenido = _serializar_dia(eventos)
+            partes = self.indice['archivos'].setdefault(mes, [])
+            archivo = f"{mes}.json.gz" if not partes else f"{mes}.{len(partes) + 1}.json.gz"
+            # mtime=0 para que el mismo contenido genere siempre el mismo archivo
+            _escribir_atomico(os.path.join(self.directorio_archivo, archivo),
+                              gzip.compress(contenido.encode('utf-8'), compresslevel=9, mtime=0))
+            partes.append({"archivo": archivo, "eventos": len(eventos),
+                           "hash": hashlib.sha256(contenido.encode('utf-8')).hexdigest(),
+                           "dias": {fecha: self.indice['dias'][fecha]['eventos'] for fecha in fechas}})
+            archivados[mes] = len(eventos)
+            for evento in eventos:
+                for url in get_processed_urls([evento]):
+                    fuentes_archivadas[url] = sorted({*fuentes_archivadas.get(url, ()), _fecha_de(evento)})
+
+        # Recién con el archivo y sus fuentes escritos se sacan los días (y sus fuentes) del
+        # almacenamiento activo
+        if archivados:
+            _escribir_atomico(self.ruta_fuentes_archivadas,
+                              json.dumps(dict(sorted(fuentes_archivadas.items())), ensure_ascii=False, indent=1))
+            self.guardar({fecha: [] for fechas in fechas_por_mes.values() for fecha in fechas},
+                         last_updated=self.indice['last_updated'])
+        return archivados
+
+    def reconstruir_indice(self):
+        """
+        Rehace indice.json, fuentes.json y archivo/fuentes.json recorriendo todos los archivos
+        de `dias/` y `archivo/`, por ejemplo después de editarlos a mano o si los índices se
+        perdieron.
+        """
+        dias, fuentes, archivos, fuentes_archivadas = {}, {}, {}, {}
+        directorio_dias = os.path.join(self.directorio, 'dias')
+        for archivo in sorted(os.listdir(directorio_dias)) if os.path.isdir(directorio_dias) else ():
+            if not archivo.endswith('.json'):
+                continue
+            eventos = self._leer_json(os.path.join(directorio_dias, archivo), [])
+            if not eventos:
+                continue
+            fecha = _fecha_de(eventos[0])
+            contenido = _serializar_dia(eventos)
+            dias[fecha] = {"archivo": archivo, "eventos": len(eventos),
+                           "hash": hashlib.sha256(contenido.encode('utf-8')).hexdigest()}
+            for url in get_processed_urls(eventos):
+                fuentes.setdefault(url, []).append(fecha)
+
+        partes = []
+        for archivo in os.listdir(self.directorio_archivo) if os.path.isdir(self.directorio_archivo) else ():
+            match = _PATRON_PARTE_ARCHIVO.fullmatch(archivo)
+            if match:
+                partes.append((match.group(1), int(match.group(2) or 1), archivo))
+        for mes, _, archivo in sorted(partes):
+            with gzip.open(os.path.join(self.directorio_archivo, archivo), 'rt', encoding='utf-8') as f:
+                contenido = f.read()
+            eventos = json.loads(contenido)
+            for evento in eventos:
+                for url in get_processed_urls([evento]):
+                    fuentes_archivadas.setdefault(url, set()).add(_fecha_de(evento))
+            archivos.setdefault(mes, []).append({
+                "archivo": archivo, "eventos": len(eventos),
+                "hash": hashlib.sha256(contenido.encode('utf-8')).hexdigest(),
+                "dias": dict(sorted(collections.Counter(_fecha_de(evento) for evento in eventos).items())),
+            })
+
+        self._indice = {"last_updated": self.indice['last_updated'], "dias": dict(sorted(dias.items())), "archivos": archivos}
+        self._fuentes = {url: sorted(fechas) for url, fechas in fuentes.items()}
+        self._fuentes_archivadas = {url: sorted(fechas) for url, fechas in sorted(fuentes_archivadas.items())}
+        _escribir_atomico(self.ruta_indice, json.dumps(self._indice, ensure_ascii=False, indent=1))
+        _escribir_atomico(self.ruta_fuentes, json.dumps(dict(sorted(self._fuentes.items())), ensure_ascii=False, indent=1))
+        if archivos or os.path.exists(self.ruta_fuentes_archivadas):
+            _escribir_atomico(self.ruta_fuentes_archivadas,
+                              json.dumps(self._fuentes_archivadas, ensure_ascii=False, indent=1))
+        return self._indice
+
+    def guardar(self, eventos_por_fecha, last_updated=None):
+        """
+        Guarda los días indicados ({fecha: [eventos]}); una lista vacía elimina el día.
+        Devuelve las fechas cuyo archivo cambió.
+        """
+        fuentes = self.fuentes
+        dias = self.indice['dias']
+        urls_por_fecha = None
+        modificadas = []
+        for fecha, eventos in sorted(eventos_por_fecha.items()):
+            contenido = _serializar_dia(eventos) if eventos else None
+            hash_contenido = hashlib.sha256(contenido.encode('utf-8')).hexdigest() if contenido else None
+            anterior = dias.get(fecha)
+            if (anterior or {}).get('hash') == hash_contenido:
+                continue
+
+            archivo = self._archivo_de_fecha(fecha)
+            ruta = os.path.join(self.directorio, 'dias', archivo)
+            if urls_por_fecha is None:
+                urls_por_fecha = {}
+                for url, fechas_url in fuentes.items():
+                    for fecha_url in fechas_url:
+                        urls_por_fecha.setdefault(fecha_url, []).append(url)
+            # Las URLs que también citan otros días se conservan con esas fechas
+            for url in urls_por_fecha.get(fecha, ()):
+                fuentes[url].remove(fecha)
+                if not fuentes[url]:
+                    del fuentes[url]
+            if contenido is None:
+                if os.path.exists(ruta):
+                    os.remove(ruta)
+                dias.pop(fecha, None)
+            else:
+                _escribir_atomico(ruta, contenido)
+                dias[fecha] = {"archivo": archivo, "eventos": len(eventos), "hash": hash_contenido}
+                for url in get_processed_urls(eventos):
+                    fuentes[url] = sorted({*fuentes.get(url, ()), fecha})
+            modificadas.append(fecha)
+
+        if modificadas:
+            self.indice['last_updated'] = last_updated or datetime.now(pytz.timezone('America/Argentina/Buenos_Aires')).isoformat()
+            self.indice['dias'] = dict(sorted(dias.items()))
+            _escribir_atomico(self.ruta_indice, json.dumps(self.indice, ensure_ascii=False, indent=1))
+            _escribir_atomico(self.ruta_fuentes, json.dumps(dict(sorted(fuentes.items())), ensure_ascii=False, indent=1))
+        return modificadas
+
+
+def agrupar_por_fecha(eventos):
+    eventos_por_fecha = {}
+    for evento in eventos:
+        eventos_por_fecha.setdefault(_fecha_de(evento), []).append(evento)
+    return eventos_por_fecha
+
+
+def exportar_protests_json(almacen, ruta=RUTA_PROTESTS_JSON):
+    """
+    Regenera el export completo protests.json a partir del almacenamiento, escribiendo
+    un evento por línea a medida que se leen los días.
+    """
+    temporal = ruta + '.tmp'
+    with open(temporal, 'w', encoding='utf-8') as f:
+        f.write('{"last_updated": ' + json.dumps(almacen.indice['last_updated']) + ', "events": [')
+        separador = "\n"
+        # Los meses archivados son anteriores a los días activos y se copian sin decodificarlos
+        for linea in almacen.lineas_archivadas():
+            f.write(separador + linea)
+            separador = ",\n"
+        for evento in almacen.iterar_eventos():
+            f.write(separador + json.dumps(evento, ensure_ascii=False))
+            separador = ",\n"
+        f.write("\n]}\n")
+    os.replace(temporal, ruta)
+
+
+def guardar_eventos_para_web(todos_los_eventos, almacen=None, fechas=None):
+    """
+    Guarda los eventos consolidados en el almacenamiento por días que usa la web.
+    Si se indican `fechas`, sólo se consideran esos días; el resto no se toca.
+    """
+    almacen = almacen or AlmacenEventos()
+    eventos_por_fecha = agrupar_por_fecha(todos_los_eventos)
+    if fechas is not None:
+        eventos_por_fecha = {fecha: eventos_por_fecha.get(fecha, []) for fecha in fechas}
+
+    try:
+        modificadas = almacen.guardar(eventos_por_fecha)
+        if not modificadas:
+            print("\n[💾] No hubo cambios en la base de eventos.")
+            return
+        exportar_protests_json(almacen)
+        print(f"\n[💾] Base de eventos guardada en {almacen.directorio}/ ({len(modificadas)} días actualizados) y en {RUTA_PROTESTS_JSON}.")
+    except Exception as e:
+        print(f"\n[!] Error al guardar los eventos: {e}")
+
+
+def cargar_historial(almacen, fecha_limite=None):
+    """
+    Carga los eventos activos del almacenamiento. Si todavía no existe, lo crea a partir
+    del protests.json de versiones anteriores. Si se indica `fecha_limite`, antes se
+    archivan los meses anteriores a esa fecha, que ya no se cargan.
+    """
+    almacen.migrar()
+    if not almacen.existe() and os.path.exists(RUTA_PROTESTS_JSON):
+        try:
+            with open(RUTA_PROTESTS_JSON, 'r', encoding='utf-8') as f:
+                datos_viejos = json.load(f)
+            eventos = datos_viejos.get('events', [])
+            almacen.guardar(agrupar_por_fecha(eventos), last_updated=datos_viejos.get('last_updated'))
+            print(f"[💾] Migrados {len(eventos)} eventos de {RUTA_PROTESTS_JSON} a {almacen.directorio}/.")
+        except (json.JSONDecodeError, OSError) as e:
+            print(f"[!] No se pudo migrar {RUTA_PROTESTS_JSON}: {e}")
+    if fecha_limite is not None:
+        archivados = almacen.archivar(fecha_limite)
+        if archivados:
+            print(f"[🗄️] Archivados {sum(archivados.values())} eventos de {len(archivados)} meses en {almacen.directorio_archivo}/.")
+    return [Evento(datos) for datos in almacen.iterar_eventos()]
+
+
+def get_processed_urls(eventos):
+    """Extrae todas las URLs de fuentes de una lista de eventos."""
+    urls = set()
+    for evento in eventos:
+        fuente = evento.get('fuente')
+        if not fuente:
+            continue
+        
+        if isinstance(fuente, list):
+            for url in fuente:
+                urls.add(url)
+        elif isinstance(fuente, str):
+            # Las fuentes pueden ser un string de URLs separadas por coma
+            urls.update(u.strip() for u in fuente.split(','))
+    return urls
+
+def incorporar_eventos(indice, almacen, eventos_nuevos, fecha_actual, textos_por_url, urls_procesadas):
+    """
+    Consolida los eventos nuevos en el índice (con el historial ya consolidado), completa
+    los horarios que faltan y guarda los días que cambiaron, junto con los cachés y las URLs
+    procesadas. Devuelve los eventos creados o modificados.
+    """
+    # El historial ya está consolidado: sólo se reconcilian los eventos nuevos.
+    with metricas.etapa('consolidacion'):
+        eventos_afectados = consolidar_incremental(indice, eventos_nuevos)
+    metricas.contar('eventos_afectados', len(eventos_afectados))
+
+    with metricas.etapa('datos_faltantes'):
+        # Solo se buscan datos faltantes de los eventos recién encontrados (y de hoy en adelante)
+        completar_datos_faltantes(eventos_afectados, fecha_actual, textos_por_url)
+
+    # --- GUARDAR DATOS PARA LA WEB ---
+    # Sólo pueden haber cambiado los días de los eventos nuevos o completados en esta corrida.
+    with metricas.etapa('guardado'):
+        fechas = {_fecha_de(evento) for evento in eventos_afectados}
+        if fechas:
+            eventos_de_las_fechas = sorted((evento for evento in indice.eventos if _fecha_de(evento) in fechas),
+                                           key=Evento.clave_orden)
+            guardar_eventos_para_web(eventos_de_las_fechas, almacen, fechas=fechas)
+
+        cache_ia.persistir()
+        cache_paginas.persistir()
+        urls_procesadas.persistir(fecha_actual)
+    return eventos_afectados
+
+
+def _zona_argentina():
+    try:
+        return pytz.timezone('America/Argentina/Buenos_Aires')
+    except pytz.UnknownTimeZoneError:
+        print("[!] No se pudo encontrar la zona horaria 'America/Argentina/Buenos_Aires'. Usando la hora local del sistema.")
+        return None
+
+
+def _cargar_estado(almacen, fecha_actual):
+    """Carga el historial activo y las URLs ya procesadas. Devuelve (eventos, urls_procesadas)."""
+    try:
+        eventos_historicos = cargar_historial(
+            almacen, (fecha_actual - timedelta(days=DIAS_VENTANA_ACTIVA)).strftime("%Y-%m-%d"))
+        urls_ya_procesadas = IndiceURLs(RUTA_URLS_PROCESADAS, urls_permanentes=almacen.urls_fuente())
+        print(f"🔍 Cargados {len(eventos_historicos)} eventos del historial. Se ignorarán {len(urls_ya_procesadas)} URLs ya procesadas.")
+    except (json.JSONDecodeError, OSError):
+        print("[!] No se encontró historial de eventos o el archivo está dañado. Se creará uno nuevo.")
+        eventos_historicos = []
+        urls_ya_procesadas = IndiceURLs(RUTA_URLS_PROCESADAS)
+    metricas.contar('eventos_historicos', len(eventos_historicos))
+    return eventos_historicos, urls_ya_procesadas
+
+
+def backfill(rutas, almacen=None, procesos=None):
+    """
+    Incorpora al almacenamiento los eventos de otros archivos (protests.json de otra copia
+    del repositorio, o un array JSON de eventos) y reconsolida todo desde cero junto con los
+    eventos guardados, en paralelo (ver consolidar_eventos_en_paralelo).
+
+    Los eventos archivados participan de la consolidación para no duplicarlos, pero el
+    archivo no se modifica: los grupos que empiezan con un evento archivado se descartan.
+    Devuelve la cantidad de eventos guardados en los días activos.
+    """
+    almacen = almacen or AlmacenEventos()
+    almacen.migrar()
+    eventos = list(almacen.iterar_archivo())
+    cantidad_archivados = len(eventos)
+    eventos.extend(almacen.iterar_eventos())
+    cantidad_guardados = len(eventos)
+    for ruta in rutas:
+        with open(ruta, 'r', encoding='utf-8') as f:
+            datos = json.load(f)
+        eventos.extend(datos.get('events', []) if isinstance(datos, dict) else datos)
+    print(f"🔄 Consolidando {len(eventos) - cantidad_guardados} eventos de {len(rutas)} archivos con "
+          f"{cantidad_guardados} guardados ({cantidad_archivados} archivados) en {procesos or PROCESOS_CONSOLIDACION} procesos...")
+
+    inicio = time.monotonic()
+    activos = [Evento.desde(evento) for posicion, evento in _consolidar_por_fecha(eventos, procesos)
+               if posicion >= cantidad_archivados]
+    print(f"[*] {len(eventos)} eventos consolidados en {len(activos)} (sin contar los archivados) "
+          f"en {time.monotonic() - inicio:.1f} s.")
+    guardar_eventos_para_web(sorted(activos, key=Evento.clave_orden), almacen)
+    return len(activos)
+
+
+def main():
+    # Configurar la zona horaria de Argentina
+    fecha_actual = datetime.now(_zona_argentina())
+    print(f"🤖 Iniciando Robot de Monitoreo de Protestas (Hora de Argentina: {fecha_actual.strftime('%Y-%m-%d %H:%M:%S')})...")
+
+    # --- Cargar eventos históricos y URLs ya procesadas ---
+    almacen = AlmacenEventos()
+    with metricas.etapa('carga_historial'):
+        eventos_historicos, urls_ya_procesadas = _cargar_estado(almacen, fecha_actual)
+
+    print(f"🗓️  Buscando nuevos eventos...")
+
+    textos_por_url = {}
+    eventos_nuevos = monitorear_sitios(SITIOS_A_MONITOREAR, fecha_actual, urls_ya_procesadas, textos_por_url)
+
+    if not eventos_nuevos:
+        print("\n✅ No se encontraron nuevos eventos en esta corrida.")
+    else:
+        print(f"\n🔄 Consolidando {len(eventos_nuevos)} eventos nuevos con {len(eventos_historicos)} del historial...")
+
+    # --- Consolidar, completar datos y guardar ---
+    with metricas.etapa('consolidacion'):
+        indice = IndiceConsolidacion(eventos_historicos)
+    incorporar_eventos(indice, almacen, eventos_nuevos, fecha_actual, textos_por_url, urls_ya_procesadas)
+
+    # --- Ordenar y mostrar ---
+    eventos_completos = sorted(indice.eventos, key=Evento.clave_orden)
+
+    print("\n" + "="*80)
+    print(f"FIXTURE DE PROTESTAS COMPLETO".center(80))
+    print("="*80 + "\n")
+    imprimir_tabla_eventos(eventos_completos)
+
+    print(f"[🗃️] Caché de IA: {cache_ia.resumen()}.")
+    imprimir_ahorro_cache_paginas()
+
+    print("\n🤖 Monitoreo finalizado.")
+
+
+# --- Modo demonio ---
+
+class PlanificadorSitios:
+    """
+    Decide cuándo volver a consultar cada sitio en el modo demonio.
+
+    Cada sitio tiene una tasa de novedades: el promedio móvil de lo que dio cada consulta
+    (1 si aparecieron eventos, 0.5 si sólo artículos nuevos, 0 si nada). Las
+    `consultas_por_hora` se reparten entre los sitios en proporción a esa tasa más un piso,
+    con intervalos entre `intervalo_minimo` e `intervalo_maximo` segundos: los sitios que
+    publican seguido se consultan cada pocos minutos y los que casi nunca tienen nada, cada
+    varias horas. Con las tasas iniciales todos se consultan una vez por hora, como con la
+    corrida horaria. La tasa y la última consulta de cada sitio se guardan en `cache`.
+    """
+
+    TASA_INICIAL = 0.5
+    PISO = 0.1
+    PESO_ULTIMA = 0.3
+
+    def __init__(self, sitios, cache, consultas_por_hora, intervalo_minimo, intervalo_maximo):
+        self.sitios = list(sitios)
+        self.cache = cache
+        self.consultas_por_hora = consultas_por_hora
+        self.intervalo_minimo = intervalo_minimo
+        self.intervalo_maximo = intervalo_maximo
+        self._estado = {}
+        for nombre in self.sitios:
+            guardado = cache.obtener(nombre) or {}
+            self._estado[nombre] = {'tasa': guardado.get('tasa', self.TASA_INICIAL), 'ultima': guardado.get('ultima')}
+
+    def intervalo(self, nombre):
+        """Segundos entre dos consultas al sitio."""
+        total = sum(self.PISO + estado['tasa'] for estado in self._estado.values())
+        consultas = self.consultas_por_hora * (self.PISO + self._estado[nombre]['tasa']) / total
+        return min(max(3600 / consultas, self.intervalo_minimo), self.intervalo_maximo)
+
+    def proxima(self, nombre):
+        """Momento (time.time()) de la próxima consulta; los sitios nunca consultados van primero."""
+        ultima = self._estado[nombre]['ultima']
+        return 0 if ultima is None else ultima + self.intervalo(nombre)
+
+    def vencidos(self, ahora):
+        return [nombre for nombre in self.sitios if self.proxima(nombre) <= ahora]
+
+    def espera(self, ahora):
+        return max(0.0, min(self.proxima(nombre) for nombre in self.sitios) - ahora)
+
+    def registrar(self, nombre, articulos, eventos, ahora):
+        estado = self._estado[nombre]
+        resultado = 1.0 if eventos else 0.5 if articulos else 0.0
+        estado['tasa'] = (1 - self.PESO_ULTIMA) * estado['tasa'] + self.PESO_ULTIMA * resultado
+        estado['ultima'] = ahora
+        self.cache.guardar(nombre, dict(estado))
+
+
+def ejecutar_demonio():
+    """
+    Corre el monitor como proceso residente: carga el historial una sola vez y consulta
+    cada sitio cuando le toca según PlanificadorSitios, reutilizando la sesión HTTP, el
+    cliente de la IA, el índice de consolidación y los cachés entre ciclos. Los días, el
+    export y los cachés se escriben sólo si cambiaron. Las métricas se guardan por ciclo.
+    Se detiene con Ctrl+C o SIGTERM.
+    """
+    global metricas
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    zona = _zona_argentina()
+    almacen = AlmacenEventos()
+    planificador = PlanificadorSitios(
+        SITIOS_A_MONITOREAR, CacheJSON(os.path.join(DIRECTORIO_CACHE, 'planificacion_sitios.json')),
+        DEMONIO_CONSULTAS_POR_HORA, DEMONIO_INTERVALO_MINIMO, DEMONIO_INTERVALO_MAXIMO)
+    dia_cargado = indice = urls_procesadas = None
+    print(f"🤖 Monitor de protestas en modo demonio ({len(SITIOS_A_MONITOREAR)} sitios, "
+          f"{DEMONIO_CONSULTAS_POR_HORA:g} consultas de portadas por hora).")
+    try:
+        while True:
+            ahora = time.time()
+            pendientes = planificador.vencidos(ahora)
+            if not pendientes:
+                time.sleep(min(planificador.espera(ahora), 300))
+                continue
+
+            metricas = MetricasCorrida()
+            ahorro_por_sitio.clear()
+            fecha_actual = datetime.now(zona)
+            try:
+                # Una vez por día se archivan los meses viejos y se recargan el historial y las URLs
+                # (si la carga falla, se reintenta en el ciclo siguiente)
+                if indice is None or dia_cargado != fecha_actual.date():
+                    with metricas.etapa('carga_historial'):
+                        eventos_historicos, urls_del_dia = _cargar_estado(almacen, fecha_actual)
+                        indice_del_dia = IndiceConsolidacion(eventos_historicos)
+                    indice, urls_procesadas, dia_cargado = indice_del_dia, urls_del_dia, fecha_actual.date()
+
+                print(f"\n[⏰] {fecha_actual.strftime('%Y-%m-%d %H:%M:%S')}: consultando {len(pendientes)} sitios.")
+                textos_por_url, novedades = {}, {}
+                eventos_nuevos = monitorear_sitios({nombre: SITIOS_A_MONITOREAR[nombre] for nombre in pendientes},
+                                                   fecha_actual, urls_procesadas, textos_por_url, novedades)
+                eventos_afectados = incorporar_eventos(indice, almacen, eventos_nuevos, fecha_actual,
+                                                       textos_por_url, urls_procesadas)
+                if eventos_afectados:
+                    imprimir_tabla_eventos(sorted(eventos_afectados, key=Evento.clave_orden))
+            except Exception as e:
+                print(f"[!] Error en el ciclo del demonio: {e}")
+                novedades = {}
+            finally:
+                if urls_procesadas is not None:
+                    urls_procesadas.liberar_en_curso()
+                for nombre in pendientes:
+                    datos = novedades.get(nombre, {})
+                    planificador.registrar(nombre, datos.get('articulos', 0), datos.get('eventos', 0), ahora)
+                planificador.cache.persistir()
+                metricas.guardar()
+
+            proximos = sorted(pendientes, key=planificador.intervalo)
+            print(f"[⏰] Próximas consultas: " + ", ".join(
+                f"{nombre} en {planificador.intervalo(nombre) / 60:.0f} min" for nombre in proximos))
+    except (KeyboardInterrupt, SystemExit):
+        print("\n🤖 Modo demonio detenido.")
+
+
+def _perfilar_hilo(*_):
+    """Gancho de threading.setprofile: cada hilo nuevo se perfila con su propio cProfile."""
+    perfil = cProfile.Profile()
+    with _lock_perfiles:
+        _perfiles_hilos.append(perfil)
+    perfil.enable()
+
+
+_perfiles_hilos = []
+_lock_perfiles = threading.Lock()
+
+
+def ejecutar():
+    """
+    Corre el monitor y guarda las métricas de la corrida, aunque termine con error.
+    Si se definió PROTESTA_PERFIL, la corrida se perfila con cProfile (incluidos los hilos
+    de descarga y de IA) y las estadísticas se guardan en ese archivo para pstats/snakeviz.
+    """
+    perfil = None
+    if RUTA_PERFIL:
+        perfil = cProfile.Profile()
+        threading.setprofile(_perfilar_hilo)
+        perfil.enable()
+    try:
+        main()
+    finally:
+        if perfil is not None:
+            perfil.disable()
+            threading.setprofile(None)
+            estadisticas = pstats.Stats(perfil)
+            for perfil_hilo in _perfiles_hilos:
+                estadisticas.add(perfil_hilo)
+            estadisticas.dump_stats(RUTA_PERFIL)
+            print(f"\n[⏱️] Perfil guardado en {RUTA_PERFIL}. Funciones con más tiempo acumulado:")
+            estadisticas.sort_stats('cumulative').print_stats(20)
+        resumen = metricas.guardar()
+        print(f"[📊] Métricas en {RUTA_METRICAS}: {resumen['segundos_total']:.1f} s, "
+              f"{resumen['http']['pedidos']} pedidos HTTP ({resumen['http']['bytes'] / 1024:.0f} KB), "
+              f"{sum(resumen['ia']['llamadas'].values())} llamadas a la IA.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Monitor de protestas.")
+    parser.add_argument('--reconstruir-indice', action='store_true',
+                        help=f"rehace {DIRECTORIO_DATOS}/indice.json y los índices de fuentes a partir de los días y el archivo, y termina")
+    parser.add_argument('--backfill', nargs='+', metavar='ARCHIVO',
+                        help="incorpora los eventos de estos archivos (protests.json u otros exports) "
+                             "reconsolidando todo en paralelo, y termina")
+    parser.add_argument('--demonio', action='store_true',
+                        help="queda corriendo y consulta cada sitio con un intervalo adaptado a cuánto publica")
+    argumentos = parser.parse_args()
+    if argumentos.reconstruir_indice:
+        indice = AlmacenEventos().reconstruir_indice()
+        print(f"[💾] Índice reconstruido: {len(indice['dias'])} días activos y "
+              f"{sum(parte['eventos'] for partes in indice['archivos'].values() for parte in partes)} eventos archivados "
+              f"en {len(indice['archivos'])} meses.")
+    elif argumentos.backfill:
+        backfill(argumentos.backfill)
+    elif argumentos.demonio:
+        ejecutar_demonio()
+    else:
+        ejecutar()
@@ -28,14 +28,25 @@ target.classList.add('active');
 
 
 // --- Data Fetching and Rendering ---
-const fetchProtests = async () => {
-try {
-const response = await fetch('protests.json?cachebust=' + new Date().getTime());
+// Los eventos se guardan en un archivo por día (data/dias/); data/indice.json indica
+// qué días existen, así que sólo se piden los tres que muestra la página.
+const fetchJSON = async (url) => {
+const response = await fetch(url + '?cachebust=' + new Date().getTime());
 if (!response.ok) throw new Error(`HTTP error! status: ${response.status}`);
-const data = await response.json();
+return response.json();
+};
 
-updateLastUpdated(data.last_updated);
-renderAllEvents(data.events);
+const fetchProtests = async () => {
+try {
+const index = await fetchJSON('data/indice.json');
+updateLastUpdated(index.last_updated);
+
+const dates = Object.values(getDateStrings());
+const days = await Promise.all(dates.map(date => {
+const day = index.dias[date];
+return day ? fetchJSON(`data/dias/${day.archivo}`) : [];
+}));
+renderAllEvents(days.flat());
 
 } catch (error) {
 console.error("Error al cargar los datos de protestas:", error);